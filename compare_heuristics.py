@@ -1,92 +1,196 @@
 import os
 import time
 import statistics
+import argparse
+import signal
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from src.scheduling.instance.instance import Instance
+from src.scheduling.instance.store import InstanceStore
 from src.scheduling.optim.constructive import Greedy, NonDeterminist
 from src.scheduling.optim.local_search import FirstNeighborLocalSearch, BestNeighborLocalSearch
 from src.scheduling.optim.neighborhoods import MyNeighborhood1
 
 DATA_DIR = 'data'
 N_RUNS = 10  # nombre d'exécutions pour les algos non-déterministes
+ALGORITHMS = ['greedy', 'first_local', 'best_local']
 
 def get_instance_folders(data_dir):
     return [os.path.join(data_dir, d) for d in os.listdir(data_dir)
             if os.path.isdir(os.path.join(data_dir, d))]
 
-def run_greedy(inst):
+def run_greedy(inst, seed):
+    return Greedy().run(inst)
+
+def run_first_local(inst, seed):
+    return FirstNeighborLocalSearch().run(inst, NonDeterminist, MyNeighborhood1, {'seed': seed})
+
+def run_best_local(inst, seed):
+    return BestNeighborLocalSearch().run(inst, NonDeterminist, params={'seed': seed})
+
+RUNNERS = {
+    'greedy': run_greedy,
+    'first_local': run_first_local,
+    'best_local': run_best_local,
+}
+
+def task_seed(base_seed, instance_name, algo, run):
+    # Ne dépend pas de l'ordre d'exécution ni du processus (hash() est aléatoire)
+    return zlib.crc32(f"{base_seed}:{instance_name}:{algo}:{run}".encode())
+
+def make_tasks(folders, n_runs, base_seed):
+    tasks = []
+    for folder in folders:
+        name = os.path.basename(folder)
+        for algo in ALGORITHMS:
+            # Greedy est déterministe : une seule exécution
+            for run in range(1 if algo == 'greedy' else n_runs):
+                tasks.append((folder, algo, run, task_seed(base_seed, name, algo, run)))
+    return tasks
+
+class TaskTimeout(Exception):
+    pass
+
+def _on_timeout(signum, frame):
+    raise TaskTimeout()
+
+_instances = {}  # instances déjà chargées par le processus
+_store = None  # magasin d'instances ouvert par le processus (pages partagées entre processus)
+
+def load_instance(folder, store_path=None):
+    global _store
+    if store_path is None:
+        return Instance.from_file(folder, cache=True)
+    if _store is None:
+        _store = InstanceStore(store_path)
+    return _store.instance(os.path.basename(folder))
+
+def run_task(task, timeout=None, store_path=None):
+    '''
+    Exécute une tâche (instance, algorithme, exécution, graine).
+    Retourne un dictionnaire avec l'objectif ou 'failed'.
+    '''
+    folder, algo, run, seed = task
+    result = {'instance': os.path.basename(folder), 'algo': algo, 'run': run, 'seed': seed,
+              'obj': 'failed', 'time': 'failed', 'error': None, 'load_error': False}
+    try:
+        if folder not in _instances:
+            _instances[folder] = load_instance(folder, store_path)
+        inst = _instances[folder]
+    except Exception as e:
+        result['error'] = f"Erreur lors du chargement de l'instance {folder}: {e}"
+        result['load_error'] = True
+        return result
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
     try:
         start = time.time()
-        sol = Greedy().run(inst)
-        elapsed = time.time() - start
-        return sol.objective, elapsed
+        sol = RUNNERS[algo](inst, seed)
+        obj = sol.objective
+        result['time'] = time.time() - start
+        result['obj'] = obj
+    except TaskTimeout:
+        result['error'] = f"timeout ({timeout} s)"
     except Exception as e:
-        return 'failed', 'failed'
-
-def run_first_local(inst):
-    best_obj = None
-    best_time = None
-    for _ in range(N_RUNS):
-        try:
-            start = time.time()
-            sol = FirstNeighborLocalSearch().run(inst, NonDeterminist, MyNeighborhood1)
-            elapsed = time.time() - start
-            if best_obj is None or sol.objective < best_obj:
-                best_obj = sol.objective
-                best_time = elapsed
-        except Exception as e:
+        result['error'] = repr(e)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    return result
+
+def run_tasks(tasks, workers, timeout, store_path=None):
+    '''
+    Répartit les tâches sur un pool de processus (ou les exécute dans le processus
+    courant si workers vaut 1) et retourne les résultats dans l'ordre des tâches.
+    '''
+    if workers == 1:
+        return [run_task(task, timeout, store_path) for task in tasks]
+    results = [None] * len(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_task, task, timeout, store_path): i for i, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                # Le processus a été tué (mémoire, ...) : la tâche est un échec
+                folder, algo, run, seed = tasks[i]
+                results[i] = {'instance': os.path.basename(folder), 'algo': algo, 'run': run, 'seed': seed,
+                              'obj': 'failed', 'time': 'failed', 'error': repr(e), 'load_error': False}
+    return results
+
+def merge_results(task_results):
+    '''
+    Regroupe les résultats par instance : pour chaque algorithme, on garde
+    le meilleur objectif et le temps de l'exécution correspondante.
+    '''
+    by_instance = {}
+    load_errors = {}
+    for r in task_results:
+        if r['load_error']:
+            load_errors[r['instance']] = r['error']
             continue
-    if best_obj is None:
-        return 'failed', 'failed'
-    return best_obj, best_time
-
-def run_best_local(inst):
-    best_obj = None
-    best_time = None
-    for _ in range(N_RUNS):
-        try:
-            start = time.time()
-            sol = BestNeighborLocalSearch().run(inst, NonDeterminist)
-            elapsed = time.time() - start
-            if best_obj is None or sol.objective < best_obj:
-                best_obj = sol.objective
-                best_time = elapsed
-        except Exception as e:
+        entry = by_instance.setdefault(r['instance'], {'instance': r['instance']})
+        for algo in ALGORITHMS:
+            entry.setdefault(f'{algo}_obj', 'failed')
+            entry.setdefault(f'{algo}_time', 'failed')
+            entry.setdefault(f'{algo}_seed', None)
+        if r['obj'] == 'failed':
             continue
-    if best_obj is None:
-        return 'failed', 'failed'
-    return best_obj, best_time
+        best = entry[f"{r['algo']}_obj"]
+        if best == 'failed' or r['obj'] < best:
+            entry[f"{r['algo']}_obj"] = r['obj']
+            entry[f"{r['algo']}_time"] = r['time']
+            entry[f"{r['algo']}_seed"] = r['seed']
+    for name, error in sorted(load_errors.items()):
+        print(error)
+    return [by_instance[name] for name in sorted(by_instance) if name not in load_errors]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Comparaison des heuristiques sur les instances de data/")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--runs', type=int, default=N_RUNS,
+                        help="nombre d'exécutions des algorithmes non-déterministes")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="nombre de processus (1 : exécution dans le processus courant)")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="temps maximal d'une exécution en secondes (échec au-delà)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="graine de base, dont dérive la graine de chaque exécution")
+    parser.add_argument('--replay', nargs=3, metavar=('INSTANCE', 'ALGO', 'SEED'),
+                        help="rejoue une seule exécution (par exemple pour la profiler)")
+    parser.add_argument('--store', metavar='FICHIER',
+                        help="lit les instances dans ce fichier (construit à partir de data-dir s'il n'existe pas)")
+    return parser.parse_args()
+
+def replay(data_dir, instance_name, algo, seed, timeout, store_path=None):
+    r = run_task((os.path.join(data_dir, instance_name), algo, 0, int(seed)), timeout, store_path)
+    if r['error']:
+        print(f"échec {r['instance']} {r['algo']} (graine {r['seed']}) : {r['error']}")
+    else:
+        print(f"{r['instance']} {r['algo']} (graine {r['seed']}) : objectif {r['obj']}, temps {r['time']:.4f} s")
 
 def main():
-    folders = sorted(get_instance_folders(DATA_DIR))
-    results = []
-    nb_fail_greedy = 0
-    nb_fail_first_local = 0
-    nb_fail_best_local = 0
-    for folder in folders:
-        print("folder :" + str(folder))
-        try:
-            inst = Instance.from_file(folder)
-        except Exception as e:
-            print(f"Erreur lors du chargement de l'instance {folder}: {e}")
-            continue
-        greedy_obj, greedy_time = run_greedy(inst)
-        if greedy_obj == 'failed':
-            nb_fail_greedy += 1
-        first_local_obj, first_local_time = run_first_local(inst)
-        if first_local_obj == 'failed':
-            nb_fail_first_local += 1
-        best_local_obj, best_local_time = run_best_local(inst)
-        if best_local_obj == 'failed':
-            nb_fail_best_local += 1
-        results.append({
-            'instance': os.path.basename(folder),
-            'greedy_obj': greedy_obj,
-            'greedy_time': greedy_time,
-            'first_local_obj': first_local_obj,
-            'first_local_time': first_local_time,
-            'best_local_obj': best_local_obj,
-            'best_local_time': best_local_time,
-        })
+    args = parse_args()
+    folders = sorted(get_instance_folders(args.data_dir))
+    if args.store and not os.path.exists(args.store):
+        InstanceStore.build(folders, args.store)
+    if args.replay:
+        replay(args.data_dir, *args.replay, args.timeout, args.store)
+        return
+    tasks = make_tasks(folders, args.runs, args.seed)
+    print(f"{len(tasks)} exécutions sur {len(folders)} instances, {args.workers} processus")
+    task_results = run_tasks(tasks, args.workers, args.timeout, args.store)
+    for r in task_results:
+        if r['error'] and not r['load_error']:
+            print(f"échec {r['instance']} {r['algo']} (exécution {r['run']}, graine {r['seed']}) : {r['error']}")
+    results = merge_results(task_results)
+    nb_fail_greedy = sum(1 for r in results if r['greedy_obj'] == 'failed')
+    nb_fail_first_local = sum(1 for r in results if r['first_local_obj'] == 'failed')
+    nb_fail_best_local = sum(1 for r in results if r['best_local_obj'] == 'failed')
     # Statistiques globales (on ne garde que les réussites)
     greedy_times = [r['greedy_time'] for r in results if r['greedy_time'] != 'failed']
     first_local_times = [r['first_local_time'] for r in results if r['first_local_time'] != 'failed']
@@ -127,12 +231,15 @@ def main():
     print(f"  Greedy : {nb_fail_greedy}")
     print(f"  Recherche locale 1 : {nb_fail_first_local}")
     print(f"  Recherche locale 2 : {nb_fail_best_local}")
+    print("\nGraines des meilleures exécutions (pour les rejouer avec --replay INSTANCE ALGO GRAINE) :")
+    for r in results:
+        print(f"  {r['instance']} : first_local {r['first_local_seed']}, best_local {r['best_local_seed']}")
     print("\nRemarques :")
-    print("- Les recherches locales sont lancées 10 fois par instance, seul le meilleur résultat est conservé.")
+    print(f"- Les recherches locales sont lancées {args.runs} fois par instance, seul le meilleur résultat est conservé.")
     print("- Un objectif plus bas est meilleur.")
     print("- Les temps incluent uniquement le calcul de la solution, pas le chargement de l'instance.")
-    print("- Les résultats peuvent varier légèrement d'une exécution à l'autre à cause de la non-déterminisme.")
-    print("- Les échecs (exceptions) ne sont pas pris en compte dans les moyennes.")
+    print(f"- Chaque exécution a sa propre graine, dérivée de la graine de base {args.seed} : les résultats sont reproductibles.")
+    print("- Les échecs (exceptions, dépassement du temps maximal) ne sont pas pris en compte dans les moyennes.")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,91 @@
+'''
+Command line of the benchmark.
+
+    python -m src.scheduling.bench run --output results.json [--csv results.csv]
+    python -m src.scheduling.bench compare results.json baseline.json
+    python -m src.scheduling.bench memory [--count 5]
+    python -m src.scheduling.bench importtime [--modules src.scheduling.optim.local_search]
+
+compare exits with status 1 if a regression is found.
+
+@author: Vassilissa Lehoux
+'''
+import argparse
+import os
+import sys
+
+from src.scheduling.bench.benchmark import (HEURISTICS, instance_folders, run_benchmark, save_json, save_csv,
+                                            load_results, compare, summary)
+from src.scheduling.bench.memory import largest_instances, measure_memory, format_memory
+from src.scheduling.bench.importtime import measure_imports, format_import
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.scheduling.bench')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the benchmark')
+    run.add_argument('--data-dir', default='data')
+    run.add_argument('--instances', nargs='+', help='instance names (default: all the jsp* of data-dir)')
+    run.add_argument('--heuristics', nargs='+', default=list(HEURISTICS), choices=list(HEURISTICS))
+    run.add_argument('--seeds', nargs='+', type=int, default=[0, 1, 2])
+    run.add_argument('--no-memory', action='store_true', help='do not measure the peak memory (twice faster)')
+    run.add_argument('--output', help='JSON file of the results')
+    run.add_argument('--csv', help='CSV file of the results')
+    run.add_argument('--baseline', help='results to compare with')
+    run.add_argument('--quiet', action='store_true')
+
+    cmp = commands.add_parser('compare', help='compare results to a baseline')
+    cmp.add_argument('results')
+    cmp.add_argument('baseline')
+    memory = commands.add_parser('memory', help='memory used by the objects on the largest instances')
+    memory.add_argument('--data-dir', default='data')
+    memory.add_argument('--count', type=int, default=5, help='number of instances')
+
+    imports = commands.add_parser('importtime', help='import time of modules in a new interpreter')
+    imports.add_argument('--modules', nargs='+', default=['src.scheduling.optim.local_search'])
+    imports.add_argument('--repeat', type=int, default=5)
+
+    for p in (run, cmp):
+        p.add_argument('--time-tolerance', type=float, default=0.2, help='relative slowdown allowed')
+        p.add_argument('--min-time', type=float, default=0.01, help='slowdowns below this (s) are ignored')
+        p.add_argument('--quality-tolerance', type=float, default=0.0, help='relative objective increase allowed')
+    args = parser.parse_args(argv)
+
+    if args.command == 'memory':
+        for folder in largest_instances(instance_folders(args.data_dir), args.count):
+            print(format_memory(measure_memory(folder)))
+        return 0
+
+    if args.command == 'importtime':
+        for record in measure_imports(args.modules, args.repeat):
+            print(format_import(record))
+        return 0
+
+    if args.command == 'run':
+        folders = instance_folders(args.data_dir)
+        if args.instances:
+            folders = [f for f in folders if os.path.basename(f) in args.instances]
+        records = run_benchmark(folders, args.heuristics, args.seeds, memory=not args.no_memory,
+                                verbose=not args.quiet)
+        print(summary(records))
+        if args.output:
+            save_json(records, args.output)
+        if args.csv:
+            save_csv(records, args.csv)
+        if not args.baseline:
+            return 0
+        baseline = load_results(args.baseline)
+    else:
+        records = load_results(args.results)
+        baseline = load_results(args.baseline)
+
+    regressions = compare(records, baseline, args.time_tolerance, args.min_time, args.quality_tolerance)
+    for regression in regressions:
+        print(regression)
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
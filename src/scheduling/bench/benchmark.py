@@ -0,0 +1,198 @@
+'''
+Benchmark of the heuristics: time, peak memory, objective and gap to the lower
+bound of the instance per instance and seed, saved as JSON or CSV and compared to a baseline to detect regressions.
+
+@author: Vassilissa Lehoux
+'''
+from typing import Callable, Dict, List
+import csv
+import glob
+import json
+import os
+import time
+import tracemalloc
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.solution import Solution
+from src.scheduling.optim.constructive import Greedy, NonDeterminist
+from src.scheduling.optim.dispatching import ListScheduling
+from src.scheduling.optim.local_search import FirstNeighborLocalSearch, BestNeighborLocalSearch
+from src.scheduling.optim.neighborhoods import MyNeighborhood1, CriticalPathNeighborhood
+from src.scheduling.optim.tabu_search import TabuSearch
+from src.scheduling.optim.simulated_annealing import SimulatedAnnealing
+
+
+# name -> function(instance, seed) returning a solution
+HEURISTICS: Dict[str, Callable[[Instance, int], Solution]] = {
+    'greedy': lambda inst, seed: Greedy().run(inst),
+    'non_det': lambda inst, seed: NonDeterminist().run(inst, {'seed': seed}),
+    'list_ect': lambda inst, seed: ListScheduling().run(inst, {'rule': 'ect'}),
+    'first_local': lambda inst, seed: FirstNeighborLocalSearch().run(inst, NonDeterminist, MyNeighborhood1,
+                                                                     {'seed': seed}),
+    'critical_local': lambda inst, seed: FirstNeighborLocalSearch().run(inst, NonDeterminist, CriticalPathNeighborhood,
+                                                                        {'seed': seed}),
+    'best_local': lambda inst, seed: BestNeighborLocalSearch().run(inst, NonDeterminist, params={'seed': seed}),
+    'tabu': lambda inst, seed: TabuSearch().run(inst, {'seed': seed, 'max_iterations': 300}),
+    'annealing': lambda inst, seed: SimulatedAnnealing().run(inst, {'seed': seed, 'max_iterations': 3000}),
+}
+
+DETERMINISTIC = {'greedy', 'list_ect'}
+
+FIELDS = ['instance', 'heuristic', 'seed', 'time', 'peak_memory', 'objective', 'lower_bound', 'gap',
+          'feasible', 'error']
+
+
+def instance_folders(data_dir: str) -> List[str]:
+    '''
+    Folders of the jsp* instances of data_dir, in natural order
+    '''
+    folders = [f for f in glob.glob(os.path.join(data_dir, 'jsp*')) if os.path.isdir(f)]
+    return sorted(folders, key=lambda f: (len(os.path.basename(f)), os.path.basename(f)))
+
+
+def run_once(instance: Instance, heuristic: str, seed: int, memory: bool = True) -> Dict:
+    '''
+    Runs the heuristic once.
+    The time is measured without tracemalloc, which slows down the run,
+    and the peak memory during a second identical run.
+    '''
+    record = {'instance': instance.name, 'heuristic': heuristic, 'seed': seed,
+              'time': None, 'peak_memory': None, 'objective': None,
+              'lower_bound': instance.lower_bounds().objective, 'gap': None, 'feasible': False, 'error': None}
+    run = HEURISTICS[heuristic]
+    try:
+        start = time.perf_counter()
+        sol = run(instance, seed)
+        record['time'] = time.perf_counter() - start
+        record['feasible'] = sol.is_feasible
+        if sol.is_feasible:
+            record['objective'] = sol.objective
+            record['gap'] = instance.lower_bounds().gap(sol.objective)
+        if memory:
+            tracemalloc.start()
+            try:
+                run(instance, seed)
+                record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    except Exception as e:
+        record['error'] = repr(e)
+    return record
+
+
+def run_benchmark(folders: List[str], heuristics: List[str], seeds: List[int],
+                  memory: bool = True, verbose: bool = False) -> List[Dict]:
+    '''
+    Runs each heuristic on each instance, once per seed
+    (once for the deterministic heuristics).
+    '''
+    records = []
+    for folder in folders:
+        instance = Instance.from_file(folder, cache=True)
+        for heuristic in heuristics:
+            for seed in ([seeds[0]] if heuristic in DETERMINISTIC else seeds):
+                record = run_once(instance, heuristic, seed, memory)
+                if verbose:
+                    print(format_record(record))
+                records.append(record)
+    return records
+
+
+def format_record(record: Dict) -> str:
+    if record['error']:
+        return f"{record['instance']} {record['heuristic']} seed={record['seed']} error={record['error']}"
+    memory = f"{record['peak_memory'] / 1024:.0f} KiB" if record['peak_memory'] is not None else "-"
+    gap = f"{record['gap']:.1%}" if record.get('gap') is not None else "-"
+    return (f"{record['instance']} {record['heuristic']} seed={record['seed']} "
+            f"time={record['time']:.4f}s memory={memory} objective={record['objective']} gap={gap}")
+
+
+def save_json(records: List[Dict], path: str):
+    with open(path, 'w') as f:
+        json.dump(records, f, indent=1)
+
+
+def save_csv(records: List[Dict], path: str):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+
+
+def load_results(path: str) -> List[Dict]:
+    '''
+    Loads results saved by save_json or save_csv
+    '''
+    if not path.endswith('.csv'):
+        with open(path, 'r') as f:
+            return json.load(f)
+    records = []
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            records.append({
+                'instance': row['instance'],
+                'heuristic': row['heuristic'],
+                'seed': int(row['seed']),
+                'time': float(row['time']) if row['time'] else None,
+                'peak_memory': int(row['peak_memory']) if row['peak_memory'] else None,
+                'objective': int(row['objective']) if row['objective'] else None,
+                'lower_bound': int(row['lower_bound']) if row.get('lower_bound') else None,
+                'gap': float(row['gap']) if row.get('gap') else None,
+                'feasible': row['feasible'] == 'True',
+                'error': row['error'] or None,
+            })
+    return records
+
+
+def compare(records: List[Dict], baseline: List[Dict], time_tolerance: float = 0.2,
+            min_time: float = 0.01, quality_tolerance: float = 0.0) -> List[str]:
+    '''
+    Returns the regressions of records with respect to the baseline,
+    for the (instance, heuristic, seed) present in both.
+    @param time_tolerance: relative slowdown allowed
+    @param min_time: slowdowns smaller than min_time seconds are ignored (noise)
+    @param quality_tolerance: relative increase of the objective allowed
+    '''
+    reference = {(r['instance'], r['heuristic'], r['seed']): r for r in baseline}
+    regressions = []
+    for record in records:
+        key = (record['instance'], record['heuristic'], record['seed'])
+        if key not in reference:
+            continue
+        base = reference[key]
+        name = f"{record['instance']} {record['heuristic']} seed={record['seed']}"
+        if record['error'] and not base['error']:
+            regressions.append(f"{name}: fails ({record['error']})")
+            continue
+        if base['feasible'] and not record['feasible']:
+            regressions.append(f"{name}: not feasible any more")
+            continue
+        if (base['objective'] is not None and record['objective'] is not None
+                and record['objective'] > base['objective'] + abs(base['objective']) * quality_tolerance):
+            regressions.append(f"{name}: objective {base['objective']} -> {record['objective']}")
+        if (base['time'] is not None and record['time'] is not None
+                and record['time'] > base['time'] * (1 + time_tolerance)
+                and record['time'] - base['time'] > min_time):
+            regressions.append(f"{name}: time {base['time']:.4f}s -> {record['time']:.4f}s")
+    return regressions
+
+
+def summary(records: List[Dict]) -> str:
+    '''
+    Total time, maximal peak memory, mean objective and mean gap per heuristic
+    '''
+    lines = []
+    for heuristic in dict.fromkeys(r['heuristic'] for r in records):
+        runs = [r for r in records if r['heuristic'] == heuristic]
+        times = [r['time'] for r in runs if r['time'] is not None]
+        memories = [r['peak_memory'] for r in runs if r['peak_memory'] is not None]
+        objectives = [r['objective'] for r in runs if r['objective'] is not None]
+        gaps = [r['gap'] for r in runs if r.get('gap') is not None]
+        failures = sum(1 for r in runs if r['error'] or not r['feasible'])
+        mean_objective = f"{sum(objectives) / len(objectives):.1f}" if objectives else "-"
+        peak = f"{max(memories) / 1024:.0f} KiB" if memories else "-"
+        mean_gap = f"{sum(gaps) / len(gaps):.1%}" if gaps else "-"
+        lines.append(f"{heuristic}: {len(runs)} runs, {failures} failures, total time {sum(times):.3f}s, "
+                     f"max peak memory {peak}, mean objective {mean_objective}, mean gap {mean_gap}")
+    return "\n".join(lines)
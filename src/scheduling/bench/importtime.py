@@ -0,0 +1,56 @@
+'''
+Import time of a module, measured in a new interpreter with python -X importtime
+(what a pool worker pays before running anything).
+
+@author: Vassilissa Lehoux
+'''
+from typing import Dict, List
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def import_times(module: str) -> Dict[str, int]:
+    '''
+    Cumulative import time (microseconds) of each module imported by
+    'import module' in a new interpreter.
+    '''
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             capture_output=True, text=True, cwd=ROOT, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def measure_import(module: str, repeat: int = 5) -> Dict:
+    '''
+    Best import time of the module over repeat runs (microseconds),
+    with the slowest modules it imports and the packages it loads.
+    '''
+    runs = [import_times(module) for _ in range(repeat)]
+    best = min(runs, key=lambda times: times[module])
+    top_level = {name.split('.')[0] for name in best}
+    slowest = sorted((name for name in best if name != module), key=lambda name: -best[name])[:5]
+    return {'module': module, 'time': best[module],
+            'slowest': [(name, best[name]) for name in slowest],
+            'matplotlib': 'matplotlib' in top_level, 'numpy': 'numpy' in top_level}
+
+
+def format_import(record: Dict) -> str:
+    lines = [f"import {record['module']}: {record['time'] / 1000:.1f} ms "
+             f"(matplotlib {'loaded' if record['matplotlib'] else 'not loaded'}, "
+             f"numpy {'loaded' if record['numpy'] else 'not loaded'})"]
+    for name, time in record['slowest']:
+        lines.append(f"  {name}: {time / 1000:.1f} ms")
+    return "\n".join(lines)
+
+
+def measure_imports(modules: List[str], repeat: int = 5) -> List[Dict]:
+    return [measure_import(module, repeat) for module in modules]
@@ -0,0 +1,58 @@
+'''
+Memory used by the instance objects and by the copies of solutions made
+by the local searches, on the largest instances.
+
+@author: Vassilissa Lehoux
+'''
+from typing import Dict, List
+import copy
+import gc
+import os
+import tracemalloc
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.optim.constructive import NonDeterminist
+
+
+def largest_instances(folders: List[str], count: int) -> List[str]:
+    '''
+    The count folders whose instances have the most operations
+    '''
+    sizes = {folder: Instance.from_file(folder).nb_operations for folder in folders}
+    return sorted(folders, key=lambda folder: -sizes[folder])[:count]
+
+
+def _allocated() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def measure_memory(folder: str, seed: int = 0) -> Dict:
+    '''
+    Memory allocated (bytes) by:
+    - instance: the loaded instance
+    - schedule: the schedule of a solution (operations and machines scheduled)
+    - copy: one deep copy of the solution, as done for each neighbor
+    '''
+    tracemalloc.start()
+    try:
+        before = _allocated()
+        instance = Instance.from_file(folder)
+        loaded = _allocated()
+        sol = NonDeterminist().run(instance, {'seed': seed})
+        scheduled = _allocated()
+        sol_copy = copy.deepcopy(sol)
+        copied = _allocated()
+    finally:
+        tracemalloc.stop()
+    del sol_copy
+    return {'instance': instance.name, 'nb_operations': instance.nb_operations,
+            'instance_bytes': loaded - before, 'schedule_bytes': scheduled - loaded, 'copy_bytes': copied - scheduled}
+
+
+def format_memory(record: Dict) -> str:
+    return (f"{record['instance']} ({record['nb_operations']} operations): "
+            f"instance {record['instance_bytes'] / 1024:.1f} KiB, "
+            f"schedule {record['schedule_bytes'] / 1024:.1f} KiB, "
+            f"copy {record['copy_bytes'] / 1024:.1f} KiB "
+            f"({record['copy_bytes'] / record['nb_operations']:.0f} B per operation)")
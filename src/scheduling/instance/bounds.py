@@ -0,0 +1,85 @@
+'''
+Lower bounds of the objective of an instance, to know how far a
+solution is from the optimum and to stop a search that reached it.
+They only use the data of the instance and are computed in one pass.
+
+@author: Vassilissa Lehoux
+'''
+from typing import List
+
+
+class LowerBounds(object):
+    '''
+    Lower bounds of an instance:
+    - job_completion: completion time of each job (in the order of instance.jobs).
+      An operation starts at the earliest once its machine is set up, and then
+      the operations of its job that follow it take at least their minimal duration.
+    - cmax: makespan, the largest of the job bounds and of the machine-load bounds:
+      the minimal work shared by all the machines, and the work of the operations
+      that only one machine can execute, after the set up of the machine.
+    - sum_ci: sum of the job bounds.
+    - energy: minimal energy of each operation, plus the set up and tear down
+      of the machines that some operation can only be executed on (at least
+      one machine is started).
+    - objective: bound of Solution.objective.
+    '''
+    __slots__ = ('job_completion', 'cmax', 'sum_ci', 'energy', 'objective')
+
+    def __init__(self, job_completion: List[int], cmax: int, energy: int):
+        self.job_completion = job_completion
+        self.cmax = cmax
+        self.sum_ci = sum(job_completion)
+        self.energy = energy
+        self.objective = energy*2 + self.sum_ci
+
+    @classmethod
+    def from_instance(cls, instance):
+        machines = {m.machine_id: m for m in instance.machines}
+
+        job_completion = []
+        for job in instance.jobs:
+            bound = 0
+            remaining = 0
+            for op in reversed(job.operations_view):
+                earliest_end = min((machines[machine_id].set_up_time + duration
+                                    for machine_id, duration, _ in op.machine_options), default=0)
+                bound = max(bound, earliest_end + remaining)
+                remaining += max(op.min_duration, 0)
+            job_completion.append(bound)
+
+        # Work and energy that each machine cannot avoid
+        forced_load = {}
+        total_work = 0
+        energy = 0
+        for op in instance.operations:
+            total_work += max(op.min_duration, 0)
+            energy += max(op.min_energy, 0)
+            if len(op.machine_options) == 1:
+                machine_id, duration, _ = op.machine_options[0]
+                forced_load[machine_id] = forced_load.get(machine_id, 0) + duration
+
+        cmax = max(job_completion, default=0)
+        if machines:
+            min_set_up = min(m.set_up_time for m in machines.values())
+            cmax = max(cmax, min_set_up - (-total_work // len(machines)))
+        for machine_id, load in forced_load.items():
+            cmax = max(cmax, machines[machine_id].set_up_time + load)
+
+        restart = {m.machine_id: m._set_up_energy + m._tear_down_energy for m in machines.values()}
+        if forced_load:
+            energy += sum(restart[machine_id] for machine_id in forced_load)
+        elif instance.operations and restart:
+            energy += min(restart.values())
+        return cls(job_completion, cmax, energy)
+
+    def gap(self, objective: int) -> float:
+        '''
+        Relative gap (objective - bound) / objective of a solution,
+        0 if the solution is optimal.
+        '''
+        if objective <= self.objective:
+            return 0.0
+        return (objective - self.objective) / objective
+
+    def __str__(self):
+        return f"LB(objective={self.objective}, energy={self.energy}, sum_ci={self.sum_ci}, cmax={self.cmax})"
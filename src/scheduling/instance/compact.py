@@ -0,0 +1,127 @@
+'''
+Array view of an instance.
+The operations are stored job by job, in the order of their job,
+and the machines in the order of Instance.machines.
+
+@author: Vassilissa Lehoux
+'''
+import numpy as np
+
+
+# Duration and energy of an operation on a machine that cannot execute it
+INELIGIBLE = -1
+
+
+class CompactInstance(object):
+    '''
+    Instance data stored in NumPy arrays:
+    - duration, energy: matrices (operations x machines), INELIGIBLE when
+      the machine cannot execute the operation
+    - job_offsets: operations of job j are the rows job_offsets[j] to job_offsets[j+1]-1
+    - one vector per machine parameter
+    '''
+
+    def __init__(self, name: str, job_ids: np.ndarray, operation_ids: np.ndarray,
+                 job_offsets: np.ndarray, machine_ids: np.ndarray,
+                 duration: np.ndarray, energy: np.ndarray,
+                 set_up_time: np.ndarray, set_up_energy: np.ndarray,
+                 tear_down_time: np.ndarray, tear_down_energy: np.ndarray,
+                 min_consumption: np.ndarray, end_time: np.ndarray):
+        '''
+        Constructor
+        @param job_ids: id of the job of each operation
+        @param operation_ids: id of each operation
+        @param machine_ids: id of the machine of each column
+        '''
+        self.name = name
+        self.job_ids = job_ids
+        self.operation_ids = operation_ids
+        self.job_offsets = job_offsets
+        self.machine_ids = machine_ids
+        self.duration = duration
+        self.energy = energy
+        self.set_up_time = set_up_time
+        self.set_up_energy = set_up_energy
+        self.tear_down_time = tear_down_time
+        self.tear_down_energy = tear_down_energy
+        self.min_consumption = min_consumption
+        self.end_time = end_time
+
+    @classmethod
+    def from_instance(cls, instance):
+        job_ids = []
+        operation_ids = []
+        job_offsets = [0]
+        for job in instance.jobs:
+            for op in job.operations_view:
+                job_ids.append(op.job_id)
+                operation_ids.append(op.operation_id)
+            job_offsets.append(len(operation_ids))
+        machines = instance.machines
+        column = {m.machine_id: k for k, m in enumerate(machines)}
+
+        duration = np.full((len(operation_ids), len(machines)), INELIGIBLE, dtype=np.int64)
+        energy = np.full((len(operation_ids), len(machines)), INELIGIBLE, dtype=np.int64)
+        row = 0
+        for job in instance.jobs:
+            for op in job.operations_view:
+                for machine_id, (op_duration, op_energy) in op._machine_info.items():
+                    if machine_id in column:
+                        duration[row, column[machine_id]] = op_duration
+                        energy[row, column[machine_id]] = op_energy
+                row += 1
+
+        def machine_vector(attribute):
+            return np.array([getattr(m, attribute) for m in machines], dtype=np.int64)
+
+        return cls(instance.name,
+                   np.array(job_ids, dtype=np.int64),
+                   np.array(operation_ids, dtype=np.int64),
+                   np.array(job_offsets, dtype=np.int64),
+                   machine_vector('_machine_id'),
+                   duration, energy,
+                   machine_vector('_set_up_time'),
+                   machine_vector('_set_up_energy'),
+                   machine_vector('_tear_down_time'),
+                   machine_vector('_tear_down_energy'),
+                   machine_vector('_min_consumption'),
+                   machine_vector('_end_time'))
+
+    @property
+    def nb_operations(self) -> int:
+        return self.duration.shape[0]
+
+    @property
+    def nb_machines(self) -> int:
+        return self.duration.shape[1]
+
+    @property
+    def nb_jobs(self) -> int:
+        return len(self.job_offsets) - 1
+
+    @property
+    def eligible(self) -> np.ndarray:
+        '''
+        Boolean matrix (operations x machines), True if the machine
+        can execute the operation
+        '''
+        return self.duration != INELIGIBLE
+
+    @property
+    def job_of_operation(self) -> np.ndarray:
+        '''
+        Index of the job (in job_offsets) of each operation
+        '''
+        return np.repeat(np.arange(self.nb_jobs), np.diff(self.job_offsets))
+
+    @property
+    def first_of_job(self) -> np.ndarray:
+        '''
+        Boolean vector, True for the first operation of each job
+        '''
+        first = np.zeros(self.nb_operations, dtype=bool)
+        first[self.job_offsets[:-1][np.diff(self.job_offsets) > 0]] = True
+        return first
+
+    def __str__(self):
+        return f"{self.name}_M{self.nb_machines}_J{self.nb_jobs}_O{self.nb_operations}"
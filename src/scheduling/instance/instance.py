@@ -5,11 +5,12 @@ Information for the instance of the optimization problem.
 '''
 from typing import List
 import os
-import csv
 
 from src.scheduling.instance.job import Job
 from src.scheduling.instance.operation import Operation
 from src.scheduling.instance.machine import Machine
+from src.scheduling.instance.view import ListView
+from src.scheduling.instance.loader import load_rows, OP_COLUMNS, MACHINE_COLUMNS
 
 
 class Instance(object):
@@ -28,34 +29,50 @@ class Instance(object):
         self._machine_dict = {}
         self._job_dict = {}
         self._operation_dict = {}
+        self._topological_order = []
+        self._topological_order_view = ListView(self._topological_order)
+        # Rows indexed by operation index, columns by machine id
+        self._eligibility = []
+        # Operations that each machine can execute, by machine id
+        self._eligible_operations = []
+        self._compact = None
+        self._lower_bounds = None
 
     @classmethod
-    def from_file(cls, folderpath):
-        inst = cls(os.path.basename(folderpath))
+    def from_file(cls, folderpath, cache: bool = False):
+        '''
+        Reads the instance in the folder (files <name>_op.csv and <name>_mach.csv).
+        @param cache: keep the parsed files in a binary cache next to them
+          to load the instance faster the next times (see loader)
+        '''
+        op_rows, machine_rows = load_rows(folderpath, cache)
+        return cls.from_rows(os.path.basename(os.path.normpath(folderpath)), op_rows, machine_rows)
+
+    @classmethod
+    def from_rows(cls, instance_name, op_rows, machine_rows):
+        '''
+        Builds the instance from the rows of the CSV files, flattened:
+        op_rows has 5 values per row and machine_rows 7 (see loader).
+        '''
+        inst = cls(instance_name)
         # Reading the operation info
         jobs = {}
         operations = {}
         op_list = []
-        with open(folderpath + os.path.sep + inst._instance_name + '_op.csv', 'r') as csv_file:
-            csv_reader = csv.reader(csv_file)
-            header = next(csv_reader)
-            for row in csv_reader:
-                job_id = int(row[0])
-                op_id = int(row[1])
-                machine_id = int(row[2])
-                processing_time = int(row[3])
-                energy = int(row[4])
-                # Create job if not exists
-                if job_id not in jobs:
-                    jobs[job_id] = Job(job_id)
-                # Create operation if not exists
-                if (job_id, op_id) not in operations:
-                    op = Operation(job_id, op_id)
-                    operations[(job_id, op_id)] = op
-                    op_list.append(op)
-                    jobs[job_id].add_operation(op)
-                # Add machine info to operation (no Machine instance, just data)
-                operations[(job_id, op_id)]._machine_info[machine_id] = (processing_time, energy)
+        for k in range(0, len(op_rows), OP_COLUMNS):
+            job_id, op_id, machine_id, processing_time, energy = op_rows[k:k + OP_COLUMNS]
+            # Create job if not exists
+            if job_id not in jobs:
+                jobs[job_id] = Job(job_id)
+            # Create operation if not exists
+            op = operations.get((job_id, op_id))
+            if op is None:
+                op = Operation(job_id, op_id)
+                operations[(job_id, op_id)] = op
+                op_list.append(op)
+                jobs[job_id].add_operation(op)
+            # Add machine info to operation (no Machine instance, just data)
+            op._machine_info[machine_id] = (processing_time, energy)
         inst._jobs = list(jobs.values())
         inst._job_dict = jobs
         inst._operations = op_list
@@ -64,24 +81,50 @@ class Instance(object):
         # reading machine info
         machines = []
         machine_dict = {}
-        with open(folderpath + os.path.sep + inst._instance_name + '_mach.csv', 'r') as csv_file:
-            csv_reader = csv.reader(csv_file)
-            header = next(csv_reader)
-            for row in csv_reader:
-                machine_id = int(row[0])
-                set_up_time = int(row[1])
-                set_up_energy = int(row[2])
-                tear_down_time = int(row[3])
-                tear_down_energy = int(row[4])
-                min_consumption = int(row[5])
-                end_time = int(row[6])
-                machine = Machine(machine_id, set_up_time, set_up_energy, tear_down_time, tear_down_energy, min_consumption, end_time)
-                machines.append(machine)
-                machine_dict[machine_id] = machine
+        for k in range(0, len(machine_rows), MACHINE_COLUMNS):
+            machine = Machine(*machine_rows[k:k + MACHINE_COLUMNS])
+            machines.append(machine)
+            machine_dict[machine.machine_id] = machine
         inst._machines = machines
         inst._machine_dict = machine_dict
+        inst.index_operations()
         return inst
 
+    def index_operations(self):
+        '''
+        Computes once the index of each operation in operations, the topological
+        order of the operations and the machines that can execute each of them
+        (see eligibility).
+        Called when the instance is loaded, once the machines are known.
+        '''
+        for i, op in enumerate(self._operations):
+            op._index = i
+        # Order of execution used by the heuristics: by number of predecessors,
+        # then in the order of the operations. As an operation follows the
+        # operations of its job that are before it in operations, it is a
+        # topological order.
+        self._topological_order[:] = sorted(self._operations, key=lambda op: len(op.predecessors))
+
+        width = max((m.machine_id for m in self._machines), default=-1) + 1
+        self._eligibility = []
+        self._eligible_operations = [[] for _ in range(width)]
+        for op in self._operations:
+            # Machines of the operation file that are not in the instance are ignored
+            options = tuple(sorted((machine_id, duration, energy)
+                                   for machine_id, (duration, energy) in op._machine_info.items()
+                                   if machine_id in self._machine_dict))
+            row = bytearray(width)
+            for machine_id, _, _ in options:
+                row[machine_id] = 1
+                self._eligible_operations[machine_id].append(op)
+            self._eligibility.append(bytes(row))
+            op._machine_options = options
+            if options:
+                op._min_duration = min(duration for _, duration, _ in options)
+                op._max_duration = max(duration for _, duration, _ in options)
+                op._min_energy = min(energy for _, _, energy in options)
+                op._max_energy = max(energy for _, _, energy in options)
+
     @property
     def name(self):
         return self._instance_name
@@ -98,6 +141,31 @@ class Instance(object):
     def operations(self) -> List[Operation]:
         return self._operations
 
+    @property
+    def topological_order(self) -> ListView:
+        '''
+        Read only view of the operations in the order in which the heuristics
+        schedule them: every operation is after its predecessors.
+        '''
+        return self._topological_order_view
+
+    @property
+    def eligibility(self) -> List[bytes]:
+        '''
+        Eligibility bitmap: eligibility[op.index][machine_id] is 1 if the
+        machine can execute the operation, 0 otherwise.
+        '''
+        return self._eligibility
+
+    def eligible_operations(self, machine_id) -> ListView:
+        '''
+        Read only view of the operations that the machine can execute,
+        in the order of operations.
+        '''
+        if not 0 <= machine_id < len(self._eligible_operations):
+            return ListView([])
+        return ListView(self._eligible_operations[machine_id])
+
     @property
     def nb_jobs(self):
         return len(self._jobs)
@@ -119,6 +187,26 @@ class Instance(object):
     def get_job(self, job_id) -> Job:
         return self._job_dict.get(job_id, None)
 
+    def to_arrays(self):
+        '''
+        Returns the CompactInstance (NumPy arrays) view of the instance.
+        It is built on the first call.
+        '''
+        if self._compact is None:
+            from src.scheduling.instance.compact import CompactInstance
+            self._compact = CompactInstance.from_instance(self)
+        return self._compact
+
+    def lower_bounds(self):
+        '''
+        Returns the LowerBounds of the objective of the instance.
+        They are computed on the first call.
+        '''
+        if self._lower_bounds is None:
+            from src.scheduling.instance.bounds import LowerBounds
+            self._lower_bounds = LowerBounds.from_instance(self)
+        return self._lower_bounds
+
     def get_operation(self, operation_id) -> Operation:
         # operation_id can be a tuple (job_id, operation_id)
         return self._operation_dict.get(operation_id, None)
@@ -6,6 +6,7 @@ Job. It is composed of several operations.
 from typing import List
 
 from src.scheduling.instance.operation import Operation
+from src.scheduling.instance.view import ListView
 
 
 class Job(object):
@@ -13,11 +14,13 @@ class Job(object):
     Job class.
     Contains information on the next operation to schedule for that job
     '''
+    __slots__ = ('_job_id', '_operations', '_next_op_idx', '_operations_view')
 
     def __init__(self, job_id: int):
         self._job_id = job_id
         self._operations: List[Operation] = []
         self._next_op_idx = 0
+        self._operations_view = ListView(self._operations)
 
     @property
     def job_id(self) -> int:
@@ -32,6 +35,13 @@ class Job(object):
     def operations(self) -> List[Operation]:
         return self._operations.copy()
 
+    @property
+    def operations_view(self) -> ListView:
+        '''
+        Read only view of the operations of the job, in order (no copy)
+        '''
+        return self._operations_view
+
     @property
     def next_operation(self) -> Operation:
         if self.planned:
@@ -0,0 +1,138 @@
+'''
+Fast loading of the instance files.
+
+The two CSV files of an instance are parsed in one pass each into flat
+lists of integers (one row after the other). The parsed values can be kept in a
+binary cache file next to the instance, so that the next loads only read it:
+- header: magic, modification times of the CSV files, SHA-1 of their content,
+  numbers of rows
+- the operation rows then the machine rows, as native int64.
+The cache is used when the modification times match, or when the content
+has the same hash (files touched by a checkout for instance).
+
+@author: Vassilissa Lehoux
+'''
+from typing import List, Tuple
+import array
+import hashlib
+import os
+import struct
+
+
+OP_COLUMNS = 5  # job, operation, machine, processing_time, energy_consumption
+MACHINE_COLUMNS = 7  # machine_id, set_up_time, set_up_energy, tear_down_time, tear_down_energy, min_consumption, end_time
+
+CACHE_SUFFIX = '.cache'
+_MAGIC = b'JSPC0001'
+_HEADER = struct.Struct('<8sqq20sqq')
+
+
+def csv_paths(folderpath: str) -> Tuple[str, str]:
+    '''
+    Paths of the operation and machine files of the instance
+    '''
+    name = os.path.basename(os.path.normpath(folderpath))
+    return (os.path.join(folderpath, name + '_op.csv'),
+            os.path.join(folderpath, name + '_mach.csv'))
+
+
+def cache_path(folderpath: str) -> str:
+    name = os.path.basename(os.path.normpath(folderpath))
+    return os.path.join(folderpath, name + CACHE_SUFFIX)
+
+
+def parse_csv(content: bytes, nb_columns: int) -> List[int]:
+    '''
+    Values of the rows of a CSV file of integers with a header, row after row
+    '''
+    lines = content.split(maxsplit=1)
+    if len(lines) < 2:
+        return []
+    values = list(map(int, b','.join(lines[1].split()).split(b',')))
+    if len(values) % nb_columns:
+        raise ValueError(f"Expected {nb_columns} values per row")
+    return values
+
+
+def load_rows(folderpath: str, cache: bool = False) -> Tuple[List[int], List[int]]:
+    '''
+    Returns the operation rows and the machine rows of the instance, flattened.
+    @param cache: read the cache file if it is up to date, and write it otherwise
+    '''
+    op_path, machine_path = csv_paths(folderpath)
+    if cache:
+        mtimes = (os.stat(op_path).st_mtime_ns, os.stat(machine_path).st_mtime_ns)
+        rows = _read_cache(cache_path(folderpath), mtimes, op_path, machine_path)
+        if rows is not None:
+            return rows
+    with open(op_path, 'rb') as f:
+        op_content = f.read()
+    with open(machine_path, 'rb') as f:
+        machine_content = f.read()
+    op_rows = parse_csv(op_content, OP_COLUMNS)
+    machine_rows = parse_csv(machine_content, MACHINE_COLUMNS)
+    if cache:
+        _write_cache(cache_path(folderpath), mtimes, _digest(op_content, machine_content), op_rows, machine_rows)
+    return op_rows, machine_rows
+
+
+def _digest(op_content: bytes, machine_content: bytes) -> bytes:
+    sha = hashlib.sha1(op_content)
+    sha.update(b'\0')
+    sha.update(machine_content)
+    return sha.digest()
+
+
+def _read_cache(path, mtimes, op_path, machine_path):
+    '''
+    Rows stored in the cache file, None if it is missing or out of date
+    '''
+    try:
+        with open(path, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None
+    if len(content) < _HEADER.size:
+        return None
+    magic, op_mtime, machine_mtime, digest, nb_op_rows, nb_machine_rows = _HEADER.unpack_from(content)
+    size = _HEADER.size + 8 * (nb_op_rows * OP_COLUMNS + nb_machine_rows * MACHINE_COLUMNS)
+    if magic != _MAGIC or len(content) != size:
+        return None
+    if (op_mtime, machine_mtime) != mtimes:
+        with open(op_path, 'rb') as f:
+            op_content = f.read()
+        with open(machine_path, 'rb') as f:
+            machine_content = f.read()
+        if _digest(op_content, machine_content) != digest:
+            return None
+        # Same content: the cache is still good, only the times change
+        content = _HEADER.pack(_MAGIC, *mtimes, digest, nb_op_rows, nb_machine_rows) + content[_HEADER.size:]
+        _replace(path, content)
+    values = array.array('q')
+    values.frombytes(content[_HEADER.size:])
+    values = values.tolist()
+    split = nb_op_rows * OP_COLUMNS
+    return values[:split], values[split:]
+
+
+def _write_cache(path, mtimes, digest, op_rows, machine_rows):
+    header = _HEADER.pack(_MAGIC, *mtimes, digest,
+                          len(op_rows) // OP_COLUMNS, len(machine_rows) // MACHINE_COLUMNS)
+    _replace(path, header + array.array('q', op_rows + machine_rows).tobytes())
+
+
+def _replace(path, content):
+    '''
+    Writes the file atomically (several processes may load the same instance).
+    The cache is only an optimization: it is not written in read-only folders.
+    '''
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
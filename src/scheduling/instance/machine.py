@@ -3,8 +3,9 @@ Machine on which operation are executed.
 
 @author: Vassilissa Lehoux
 '''
-from typing import List
+from typing import List, Tuple
 from src.scheduling.instance.operation import Operation
+from src.scheduling.instance.view import ListView
 
 
 class Machine(object):
@@ -12,6 +13,9 @@ class Machine(object):
     Machine class.
     When operations are scheduled on the machine, contains the relative information.
     '''
+    __slots__ = ('_machine_id', '_set_up_time', '_set_up_energy', '_tear_down_time', '_tear_down_energy',
+                 '_min_consumption', '_end_time', '_scheduled_operations', '_start_times', '_stop_times',
+                 '_current_energy', '_on_change', '_operations_view', '_start_times_view', '_stop_times_view')
 
     def __init__(self, machine_id: int, set_up_time: int, set_up_energy: int, tear_down_time: int,
                  tear_down_energy:int, min_consumption: int, end_time: int):
@@ -35,12 +39,23 @@ class Machine(object):
         self._start_times = []
         self._stop_times = []
         self._current_energy = 0
+        # Called whenever the schedule of the machine changes
+        self._on_change = None
+        # The lists are only modified in place, so the views stay valid
+        self._operations_view = ListView(self._scheduled_operations)
+        self._start_times_view = ListView(self._start_times)
+        self._stop_times_view = ListView(self._stop_times)
 
     def reset(self):
-        self._scheduled_operations = []
-        self._start_times = []
-        self._stop_times = []
+        self._scheduled_operations.clear()
+        self._start_times.clear()
+        self._stop_times.clear()
         self._current_energy = 0
+        self._changed()
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change()
 
     @property
     def set_up_time(self) -> int:
@@ -50,6 +65,14 @@ class Machine(object):
     def tear_down_time(self) -> int:
         return self._tear_down_time
 
+    @property
+    def latest_end(self) -> int:
+        '''
+        Latest end time of an operation on the machine:
+        the machine must be torn down before its end time.
+        '''
+        return self._end_time - self._tear_down_time
+
     @property
     def machine_id(self) -> int:
         return self._machine_id
@@ -57,10 +80,17 @@ class Machine(object):
     @property
     def scheduled_operations(self) -> List:
         '''
-        Returns the list of the scheduled operations on the machine.
+        Returns a copy of the list of the scheduled operations on the machine.
         '''
         return self._scheduled_operations.copy()
 
+    @property
+    def scheduled_operations_view(self) -> ListView:
+        '''
+        Read only view of the scheduled operations on the machine (no copy).
+        '''
+        return self._operations_view
+
     @property
     def available_time(self) -> int:
         """
@@ -97,10 +127,12 @@ class Machine(object):
 
         # Schedule the operation
         if not operation.schedule(self.machine_id, actual_start):
+            self._changed()
             return -1  # Scheduling failed
 
         self._scheduled_operations.append(operation)
         self._current_energy += operation.energy
+        self._changed()
 
         return actual_start
 
@@ -121,6 +153,58 @@ class Machine(object):
         elif len(self._stop_times) >= 1 and self._stop_times[-1] > at_time:
             self._current_energy -= (self._stop_times[-1] - at_time) * self._min_consumption
             self._stop_times[-1] = at_time
+        self._changed()
+
+    def power_plan(self, intervals: List[Tuple[int, int]]) -> Tuple[List[int], List[int], int]:
+        '''
+        Energy-optimal start and stop times of the machine for operations
+        executed during the given (start, end) intervals, in order.
+        The machine is started just before the first operation and stopped
+        after the last one: the plan fits in the schedule of the machine if the
+        last operation ends before latest_end. Between two operations, it is
+        stopped and restarted only if the gap leaves time to tear it down and
+        set it up again and if the set up and tear down energy is lower than
+        the idle consumption.
+        With the operations fixed, each gap is decided independently, so one
+        sweep gives the optimal plan.
+        Returns the start times, the stop times and the energy consumed outside
+        the operations (set up, tear down and idle consumption).
+        Raises ValueError if the first operation starts before the machine
+        can be set up.
+        '''
+        if not intervals:
+            return [], [], 0
+        first_start, prev_end = intervals[0]
+        if first_start < self._set_up_time:
+            raise ValueError(f"Operation starting at {first_start} before the set up of machine {self}")
+        starts = [first_start - self._set_up_time]
+        stops = []
+        restart_energy = self._set_up_energy + self._tear_down_energy
+        restart_time = self._set_up_time + self._tear_down_time
+        energy = restart_energy
+        for start, end in intervals[1:]:
+            gap = start - prev_end
+            if gap >= restart_time and restart_energy < gap * self._min_consumption:
+                stops.append(prev_end)
+                starts.append(start - self._set_up_time)
+                energy += restart_energy
+            else:
+                energy += gap * self._min_consumption
+            prev_end = end
+        stops.append(prev_end)
+        return starts, stops, energy
+
+    def optimize_power(self):
+        '''
+        Replaces the start and stop times of the machine by the optimal plan
+        for its scheduled operations (see power_plan), and updates its energy.
+        '''
+        operations = sorted(self._scheduled_operations, key=lambda op: op.start_time)
+        starts, stops, energy = self.power_plan([(op.start_time, op.end_time) for op in operations])
+        self._start_times[:] = starts
+        self._stop_times[:] = stops
+        self._current_energy = energy + sum(op.energy for op in operations)
+        self._changed()
 
     @property
     def working_time(self) -> int:
@@ -136,19 +220,33 @@ class Machine(object):
     @property
     def start_times(self) -> List[int]:
         """
-        Returns the list of the times at which the machine is started
+        Returns a copy of the list of the times at which the machine is started
         in increasing order
         """
         return self._start_times.copy()
 
+    @property
+    def start_times_view(self) -> ListView:
+        """
+        Read only view of the start times (no copy)
+        """
+        return self._start_times_view
+
     @property
     def stop_times(self) -> List[int]:
         """
-        Returns the list of the times at which the machine is stopped
+        Returns a copy of the list of the times at which the machine is stopped
         in increasing order
         """
         return self._stop_times.copy()
 
+    @property
+    def stop_times_view(self) -> ListView:
+        """
+        Read only view of the stop times (no copy)
+        """
+        return self._stop_times_view
+
     @property
     def total_energy_consumption(self) -> int:
         """
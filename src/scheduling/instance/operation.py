@@ -5,13 +5,14 @@ When operation is scheduled, its schedule information is updated.
 
 @author: Vassilissa Lehoux
 '''
-from typing import List
+from typing import List, Tuple
 
 
 class OperationScheduleInfo(object):
     '''
     Informations known when the operation is scheduled
     '''
+    __slots__ = ('machine_id', 'schedule_time', 'duration', 'energy_consumption')
 
     def __init__(self, machine_id: int, schedule_time: int, duration: int, energy_consumption: int):
         self.machine_id = machine_id
@@ -28,6 +29,9 @@ class Operation(object):
     '''
     Operation of the jobs
     '''
+    __slots__ = ('_job_id', '_operation_id', '_predecessors', '_successors', '_schedule_info', '_info',
+                 '_machine_info', '_index', '_machine_options', '_min_duration',
+                 '_max_duration', '_min_energy', '_max_energy')
 
     def __init__(self, job_id, operation_id):
         '''
@@ -38,8 +42,18 @@ class Operation(object):
         self._predecessors = []
         self._successors = []
         self._schedule_info = None
+        # Schedule information of the operation, reused by each schedule:
+        # _schedule_info is _info when the operation is scheduled
+        self._info = None
         # Dictionary mapping machine_id to (duration, energy_consumption)
         self._machine_info = {}
+        # Set by the instance (see Instance.index_operations)
+        self._index = -1
+        self._machine_options = ()
+        self._min_duration = -1
+        self._max_duration = -1
+        self._min_energy = -1
+        self._max_energy = -1
 
     def __str__(self):
         '''
@@ -83,6 +97,49 @@ class Operation(object):
     def job_id(self) -> int:
         return self._job_id
 
+    @property
+    def index(self) -> int:
+        '''
+        Position of the operation in instance.operations (-1 if not indexed)
+        '''
+        return self._index
+
+    @property
+    def machine_options(self) -> Tuple[Tuple[int, int, int], ...]:
+        '''
+        (machine_id, duration, energy) for each machine of the instance
+        that can execute the operation, by machine id
+        '''
+        return self._machine_options
+
+    @property
+    def min_duration(self) -> int:
+        '''
+        Shortest duration of the operation on its eligible machines (-1 if none)
+        '''
+        return self._min_duration
+
+    @property
+    def max_duration(self) -> int:
+        '''
+        Longest duration of the operation on its eligible machines (-1 if none)
+        '''
+        return self._max_duration
+
+    @property
+    def min_energy(self) -> int:
+        '''
+        Lowest energy consumption of the operation on its eligible machines (-1 if none)
+        '''
+        return self._min_energy
+
+    @property
+    def max_energy(self) -> int:
+        '''
+        Highest energy consumption of the operation on its eligible machines (-1 if none)
+        '''
+        return self._max_energy
+
     @property
     def predecessors(self) -> List:
         """
@@ -173,12 +230,15 @@ class Operation(object):
             # Check machine availability would be handled at a higher level
 
         duration, energy = self._machine_info[machine_id]
-        self._schedule_info = OperationScheduleInfo(
-            machine_id=machine_id,
-            schedule_time=at_time,
-            duration=duration,
-            energy_consumption=energy
-        )
+        info = self._info
+        if info is None:
+            info = self._info = OperationScheduleInfo(machine_id, at_time, duration, energy)
+        else:
+            info.machine_id = machine_id
+            info.schedule_time = at_time
+            info.duration = duration
+            info.energy_consumption = energy
+        self._schedule_info = info
         return True
 
     @property
@@ -212,7 +272,7 @@ class Operation(object):
         cost = energy
 
         up_and_down_cost = machine._set_up_energy + machine._tear_down_energy
-        if not machine.scheduled_operations:
+        if not machine.scheduled_operations_view:
             cost += up_and_down_cost
         # Idle cost if there is a gap
         elif machine.available_time < time:
@@ -0,0 +1,154 @@
+'''
+Store of many instances packed in one file, read through mmap.
+
+Layout (little endian):
+- header: magic, number of instances, size of the names block
+- index: for each instance, the offset and number of rows of its operations
+  and of its machines in the data block (offsets in int32 values)
+- names block: the instance names separated by newlines, padded to 8 bytes
+- data block: the rows of the _op.csv and _mach.csv files as flat int32.
+
+The file is opened read only with mmap: the processes that open the same store
+share its pages, and the rows of an instance are memoryviews on the mapping
+(no copy) until the Instance objects are built. On a big endian host, the data
+block is copied once to be swapped to the native byte order.
+
+    python -m src.scheduling.instance.store data data.store
+
+@author: Vassilissa Lehoux
+'''
+from typing import Dict, List, Tuple
+import array
+import mmap
+import os
+import struct
+import sys
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.instance.loader import load_rows, OP_COLUMNS, MACHINE_COLUMNS
+
+
+_MAGIC = b'JSPSTORE'
+_HEADER = struct.Struct('<8sqq')
+_ENTRY = struct.Struct('<qqqq')
+_INT32_MIN, _INT32_MAX = -2**31, 2**31 - 1
+
+
+class InstanceStore(object):
+    '''
+    Read only access to a store file built by InstanceStore.build
+    '''
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, nb_instances, names_size = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an instance store")
+        index_start = _HEADER.size
+        names_start = index_start + nb_instances * _ENTRY.size
+        data_start = names_start + _padded(names_size)
+        names = self._mmap[names_start:names_start + names_size].decode().split('\n') if nb_instances else []
+        self._index: Dict[str, Tuple[int, int, int, int]] = {
+            name: _ENTRY.unpack_from(self._mmap, index_start + k * _ENTRY.size) for k, name in enumerate(names)}
+        data = memoryview(self._mmap)[data_start:]
+        if sys.byteorder == 'little':
+            self._data = data.cast('i')
+        else:
+            swapped = array.array('i')
+            swapped.frombytes(data)
+            data.release()
+            swapped.byteswap()
+            self._data = memoryview(swapped)
+
+    @classmethod
+    def build(cls, folders: List[str], path: str):
+        '''
+        Writes the store of the instances in the folders.
+        The store is not updated when the instance files change: build it again.
+        '''
+        names = []
+        entries = []
+        data = array.array('i')
+        for folder in folders:
+            op_rows, machine_rows = load_rows(folder)
+            if any(v < _INT32_MIN or v > _INT32_MAX for v in op_rows + machine_rows):
+                raise ValueError(f"Values of {folder} do not fit in 32 bits")
+            names.append(os.path.basename(os.path.normpath(folder)))
+            entries.append((len(data), len(op_rows) // OP_COLUMNS,
+                            len(data) + len(op_rows), len(machine_rows) // MACHINE_COLUMNS))
+            data.extend(op_rows)
+            data.extend(machine_rows)
+        if len(set(names)) != len(names) or any('\n' in name for name in names):
+            raise ValueError("Instance names should be unique")
+        names_block = '\n'.join(names).encode()
+        if sys.byteorder != 'little':
+            data.byteswap()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(names), len(names_block)))
+            for entry in entries:
+                f.write(_ENTRY.pack(*entry))
+            f.write(names_block.ljust(_padded(len(names_block)), b'\0'))
+            f.write(data.tobytes())
+        os.replace(tmp_path, path)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def rows(self, name: str) -> Tuple[memoryview, memoryview]:
+        '''
+        Operation rows and machine rows of the instance, flattened as in the CSV
+        files (see loader). They are views on the mapped file.
+        '''
+        op_offset, nb_op_rows, machine_offset, nb_machine_rows = self._index[name]
+        return (self._data[op_offset:op_offset + nb_op_rows * OP_COLUMNS],
+                self._data[machine_offset:machine_offset + nb_machine_rows * MACHINE_COLUMNS])
+
+    def instance(self, name: str) -> Instance:
+        return Instance.from_rows(name, *self.rows(name))
+
+    def close(self):
+        '''
+        Closes the file. If views given by rows are still used, the mapping
+        is only released with them.
+        '''
+        if getattr(self, '_data', None) is not None:
+            self._data.release()
+            self._data = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _padded(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    parser = argparse.ArgumentParser(description="Packs the instances of a folder in a store file")
+    parser.add_argument('data_dir')
+    parser.add_argument('store')
+    args = parser.parse_args()
+    folders = sorted(f for f in glob.glob(os.path.join(args.data_dir, '*')) if os.path.isdir(f))
+    InstanceStore.build(folders, args.store)
+    print(f"{len(folders)} instances written to {args.store}")
@@ -0,0 +1,49 @@
+'''
+Read only view on a list, returned instead of a copy of the list.
+
+@author: Vassilissa Lehoux
+'''
+from collections.abc import Sequence
+from copy import deepcopy
+
+
+class ListView(Sequence):
+    '''
+    Read only sequence that reflects the changes of the viewed list.
+    Slicing returns a new list.
+    '''
+    __slots__ = ('_items',)
+
+    def __init__(self, items: list):
+        self._items = items
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __reversed__(self):
+        return reversed(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __eq__(self, other):
+        if isinstance(other, ListView):
+            return self._items == other._items
+        if isinstance(other, list):
+            return self._items == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __deepcopy__(self, memo):
+        # The viewed list is usually already copied with its owner
+        return ListView(deepcopy(self._items, memo))
+
+    def __repr__(self):
+        return f"ListView({self._items!r})"
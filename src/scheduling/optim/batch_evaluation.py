@@ -0,0 +1,114 @@
+'''
+Vectorized evaluation of many candidate solutions at once.
+
+A candidate is given by the machine assigned to each operation and by the
+order in which the operations are scheduled. It is evaluated with the rules
+of Solution.schedule followed by the power plan of Solution.optimize_power,
+as done by the constructive heuristics. All the candidates are processed together, one
+scheduling step at a time, without building any Operation object.
+
+@author: Vassilissa Lehoux
+'''
+import numpy as np
+
+from src.scheduling.instance.compact import CompactInstance, INELIGIBLE
+
+
+class BatchEvaluation(object):
+    '''
+    Evaluation of a batch of candidates, one value per candidate.
+    The values of the candidates that are not feasible are not meaningful.
+    '''
+
+    def __init__(self, feasible: np.ndarray, energy: np.ndarray, sum_ci: np.ndarray, cmax: np.ndarray):
+        self.feasible = feasible
+        self.energy = energy
+        self.sum_ci = sum_ci
+        self.cmax = cmax
+
+    @property
+    def objective(self) -> np.ndarray:
+        '''
+        Objective of each candidate, as in Solution.objective
+        '''
+        return self.energy * 2 + self.sum_ci
+
+    def __len__(self):
+        return len(self.feasible)
+
+
+class BatchEvaluator(object):
+    '''
+    Evaluates candidate solutions of a CompactInstance.
+    '''
+
+    def __init__(self, compact: CompactInstance):
+        '''
+        Constructor
+        @param compact: the instance, see Instance.to_arrays
+        '''
+        self._compact = compact
+        self._first_of_job = compact.first_of_job
+
+    def evaluate(self, assignments: np.ndarray, sequences: np.ndarray) -> BatchEvaluation:
+        '''
+        Evaluates the candidates.
+        @param assignments: (candidates x operations) column of the machine
+          of each operation (operations and machines are indexed as in the
+          CompactInstance)
+        @param sequences: (candidates x operations) order in which the
+          operations are scheduled, each row is a permutation of the operations
+        '''
+        c = self._compact
+        assignments = np.atleast_2d(np.asarray(assignments, dtype=np.int64))
+        sequences = np.atleast_2d(np.asarray(sequences, dtype=np.int64))
+        nb_candidates, nb_operations = sequences.shape
+        rows = np.arange(nb_candidates)
+
+        end = np.full((nb_candidates, nb_operations), -1, dtype=np.int64)
+        started = np.zeros((nb_candidates, c.nb_machines), dtype=bool)
+        last_end = np.zeros((nb_candidates, c.nb_machines), dtype=np.int64)
+        energy = np.zeros(nb_candidates, dtype=np.int64)
+        feasible = np.ones(nb_candidates, dtype=bool)
+        # Candidates for which an operation could not be scheduled are not updated any more
+        scheduling = np.ones(nb_candidates, dtype=bool)
+
+        for step in range(nb_operations):
+            op = sequences[:, step]
+            m = assignments[rows, op]
+            duration = c.duration[op, m]
+            first = self._first_of_job[op]
+            pred_end = np.where(first, 0, end[rows, np.maximum(op - 1, 0)])
+            scheduling &= (duration != INELIGIBLE) & (first | (pred_end >= 0))
+            feasible &= scheduling
+
+            set_up_time = c.set_up_time[m]
+            tear_down_time = c.tear_down_time[m]
+            stop_start_energy = c.set_up_energy[m] + c.tear_down_energy[m]
+            was_started = started[rows, m]
+            available = last_end[rows, m]
+
+            # Machine stopped: started as late as possible before the operation
+            first_start = np.maximum(pred_end - set_up_time, 0) + set_up_time
+            # Machine running: stopped and restarted if the idle time costs more
+            next_start = np.maximum(pred_end, available)
+            idle_time = next_start - available
+            restart = ((idle_time >= tear_down_time + set_up_time)
+                       & (idle_time * c.min_consumption[m] > stop_start_energy))
+            start = np.where(was_started, next_start, first_start)
+            op_end = start + duration
+            # Power plan (see Machine.power_plan): idle consumption or restart for the gap
+            op_energy = c.energy[op, m] + np.where(was_started, np.where(restart, stop_start_energy,
+                                                                         idle_time * c.min_consumption[m]),
+                                                   stop_start_energy)
+
+            idx = rows[scheduling]
+            end[idx, op[scheduling]] = op_end[scheduling]
+            started[idx, m[scheduling]] = True
+            last_end[idx, m[scheduling]] = op_end[scheduling]
+            energy[scheduling] += op_energy[scheduling]
+            feasible &= ~scheduling | (op_end <= c.end_time[m] - c.tear_down_time[m])
+
+        job_starts = c.job_offsets[:-1][np.diff(c.job_offsets) > 0]
+        completion = np.maximum(np.maximum.reduceat(end, job_starts, axis=1), 0)
+        return BatchEvaluation(feasible, energy, completion.sum(axis=1), completion.max(axis=1, initial=0))
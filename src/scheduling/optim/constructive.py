@@ -4,11 +4,10 @@ Constructive heuristics that returns preferably **feasible** solutions.
 @author: Vassilissa Lehoux
 '''
 from typing import Dict
-import random
 
 from src.scheduling.instance.instance import Instance
 from src.scheduling.solution import Solution
-from src.scheduling.optim.heuristics import Heuristic
+from src.scheduling.optim.heuristics import Heuristic, Budget, make_rng
 
 
 class Greedy(Heuristic):
@@ -31,28 +30,20 @@ class Greedy(Heuristic):
         (the function will be evaluated with an empty dictionary).
 
         @param instance: the instance to solve
-        @param params: the parameters for the run
+        @param params: the parameters for the run: 'callback' (see Budget) is
+          called with the solution (the construction is done in one pass)
         '''
+        budget = Budget(params)
         self.solution = Solution(instance)
-        all_operation = self.solution.all_operations
-        operation_in_order_of_execution = {}
-        max_nb_op = 0
-        for operation in all_operation:
-            if f"{len(operation._predecessors)}" in operation_in_order_of_execution:
-                operation_in_order_of_execution[f"{len(operation._predecessors)}"].append(operation)
-            else:
-                operation_in_order_of_execution[f"{len(operation._predecessors)}"] = [operation]
-            max_nb_op = max(max_nb_op, len(operation._predecessors))
-        list_ordered = []
-        for i in range(max_nb_op+1):
-            list_ordered = list_ordered + operation_in_order_of_execution[f"{i}"]
-            
-        
-        for operation in list_ordered:
+        eligibility = instance.eligibility
+        for operation in instance.topological_order:
             operation
             machine_to_schedule = None
             min_start = operation.min_start_time
+            eligible = eligibility[operation.index]
             for machine in self.solution.inst.machines:
+                if not eligible[machine.machine_id]:
+                    continue
                 if machine_to_schedule == None:
                     machine_to_schedule = machine
                 elif machine_to_schedule.available_time > min_start and machine.available_time < machine_to_schedule.available_time:
@@ -60,8 +51,8 @@ class Greedy(Heuristic):
                 elif (machine.available_time < min_start or machine.available_time < machine_to_schedule.available_time) and operation.compare_machine_at_time(machine, machine_to_schedule, min_start):
                     machine_to_schedule = machine
             self.solution.schedule(operation,machine_to_schedule)
-        for machine in self.solution.inst.machines:
-            machine.stop(machine.available_time)
+        self.solution.optimize_power()
+        budget.improved(self.solution)
         return self.solution
 
 
@@ -69,6 +60,9 @@ class NonDeterminist(Heuristic):
     '''
     Heuristic that returns different values for different runs with the same parameters
     (or different values for different seeds and otherwise same parameters)
+    Each operation is assigned to a machine drawn among the machines that can execute it
+    and finish it before their end time. The earlier the operation would end on a machine,
+    the more likely the machine is chosen.
     '''
 
     def __init__(self, params: Dict=dict()):
@@ -78,6 +72,7 @@ class NonDeterminist(Heuristic):
                dictionary. Implementation should provide default values in the function.
         '''
         self.solution = Solution
+        self.seed = None
 
     def run(self, instance: Instance, params: Dict=dict()) -> Solution:
         '''
@@ -86,38 +81,82 @@ class NonDeterminist(Heuristic):
         (the function will be evaluated with an empty dictionary).
 
         @param instance: the instance to solve
-        @param params: the parameters for the run
+        @param params: the parameters for the run: 'seed' or 'rng' (see make_rng).
+          The seed used is kept in self.seed to replay the run.
+          'max_attempts' (default 100): number of constructions tried before
+          returning a non feasible solution: the construction that scheduled
+          the most operations.
+          'temperature' (default 5): a machine on which the operation ends t time
+          units later than on the best machine is 2**(t/temperature) times less likely.
+          'time_limit' (see Budget): no construction is tried after it, the first
+          one is always done. 'callback' (see Budget) is called with the solution.
         '''
+        rng, self.seed = make_rng(params)
+        budget = Budget(params)
+        max_attempts = params.get('max_attempts', 100)
+        temperature = params.get('temperature', 5)
+        if temperature <= 0:
+            raise ValueError(f"The temperature should be positive, got {temperature}")
         self.solution = Solution(instance)
-        all_operation = self.solution.all_operations
-        operation_in_order_of_execution = {}
-        max_nb_op = 0
-        nb_machine=len(self.solution.inst.machines)
-        for operation in all_operation:
-            if f"{len(operation._predecessors)}" in operation_in_order_of_execution:
-                operation_in_order_of_execution[f"{len(operation._predecessors)}"].append(operation)
-            else:
-                operation_in_order_of_execution[f"{len(operation._predecessors)}"] = [operation]
-            max_nb_op = max(max_nb_op, len(operation._predecessors))
-        is_solution = False
-        nb=0
-        while not is_solution:
-            nb = nb+1
-            for i in range(max_nb_op+1):
-                for operation in operation_in_order_of_execution[f"{i}"]:
-                    manchine_id = random.randint(0,nb_machine-1)
-                    self.solution.schedule(operation,self.solution.inst.machines[manchine_id])
-            if self.solution.is_feasible:
-                is_solution = True
-            else:
-                self.solution.reset()
-            if nb == 1000:
+        list_ordered = instance.topological_order
+
+        # Minimal processing time of the operations that follow each operation in its job
+        tail = {}
+        for job in self.solution.inst.jobs:
+            remaining = 0
+            for operation in reversed(job.operations_view):
+                tail[operation] = remaining
+                remaining += operation.min_duration
+
+        # Most complete construction that failed: (number of operations scheduled, snapshot)
+        most_complete = (-1, None)
+        for attempt in range(max_attempts):
+            if attempt > 0 and budget.expired:
+                break
+            if self._construct(list_ordered, tail, temperature, rng):
+                self.solution.optimize_power()
+                budget.improved(self.solution)
                 return self.solution
-        
-        for machine in self.solution.inst.machines:
-            machine.stop(machine.available_time)
+            scheduled = sum(1 for op in instance.operations if op.assigned)
+            if scheduled > most_complete[0]:
+                most_complete = (scheduled, self.solution.snapshot())
+            self.solution.reset()
+        if most_complete[1] is not None:
+            self.solution.restore(most_complete[1])
+        if most_complete[0] == len(instance.operations):
+            self.solution.optimize_power()
         return self.solution
 
+    def _construct(self, list_ordered, tail, temperature, rng) -> bool:
+        '''
+        Schedules the operations in the given order.
+        Returns False as soon as an operation cannot be finished in time.
+        '''
+        latest_end = max(machine.latest_end for machine in self.solution.inst.machines)
+        for operation in list_ordered:
+            min_start = operation.min_start_time
+            candidates = []
+            ends = []
+            for machine_id, duration, _ in operation.machine_options:
+                machine = self.solution.inst.get_machine(machine_id)
+                # Start time given by Solution.schedule
+                if machine.start_times_view:
+                    start = max(min_start, machine.available_time)
+                else:
+                    start = max(min_start, machine.set_up_time)
+                end = start + duration
+                # Dead end: the operation or the rest of its job cannot be done in time
+                if end > machine.latest_end or end + tail[operation] > latest_end:
+                    continue
+                candidates.append(machine)
+                ends.append(end)
+            if not candidates:
+                return False
+            best_end = min(ends)
+            weights = [2.0 ** ((best_end - end) / temperature) for end in ends]
+            self.solution.schedule(operation, rng.choices(candidates, weights)[0])
+        return self.solution.is_feasible
+
 
 if __name__ == "__main__":
     # Example of playing with the heuristics
@@ -0,0 +1,281 @@
+'''
+Incremental evaluation of the moves of the neighborhoods.
+
+A neighbor of a solution is obtained by changing the (machine, start time) of
+some operations and by rescheduling every operation in the order of execution
+(see SwapNeighborhood._swap_operations). The evaluator replays that
+rescheduling once for the current solution and then, for each move, only
+re-times the operations whose start time can change: the operations of the
+machines whose sequence is modified and the successors (on the job or on the
+machine) of the operations whose end time changes.
+No copy of the solution is made.
+
+@author: Vassilissa Lehoux
+'''
+from typing import Dict, List, Tuple
+import heapq
+from bisect import insort
+
+from src.scheduling.solution import Solution
+
+
+class DeltaEvaluator(object):
+    '''
+    Evaluates the neighbors of a solution without building them.
+    The evaluator is bound to the solution given to the constructor
+    and must be rebuilt when this solution changes.
+    '''
+
+    def __init__(self, sol: Solution):
+        '''
+        Constructor
+        @param sol: the solution whose neighbors are evaluated.
+        '''
+        inst = sol.inst
+        self._operations = inst.operations
+        self._machines = {m.machine_id: m for m in inst.machines}
+        self._eligibility = inst.eligibility
+        self._predecessors = [[p.index for p in op.predecessors] for op in self._operations]
+        self._successors = [[s.index for s in op.successors] for op in self._operations]
+        self._job_operations = {}
+        for i, op in enumerate(self._operations):
+            self._job_operations.setdefault(op.job_id, []).append(i)
+
+        # Order in which the operations are rescheduled (see Instance.topological_order)
+        self._order = [op.index for op in inst.topological_order]
+        self._rank = [0] * len(self._order)
+        for r, i in enumerate(self._order):
+            self._rank[i] = r
+
+        # Current (machine, start time) of every operation
+        self._machine = [op.assigned_to for op in self._operations]
+        self._release = [op.start_time for op in self._operations]
+
+        # Sequence of the operations on each machine, in rescheduling order
+        self._sequences = {m: [] for m in self._machines}
+        for i in self._order:
+            if self._machine[i] in self._sequences:
+                self._sequences[self._machine[i]].append(i)
+        self._position = [-1] * len(self._operations)
+        for seq in self._sequences.values():
+            for pos, i in enumerate(seq):
+                self._position[i] = pos
+
+        replay = self._replay(self._machine, self._release)
+        self._feasible, self._start, self._end, self._energy, self._objective, self._power = replay
+        if self._feasible:
+            self._completion = {job: max(self._end[i] for i in ops)
+                                for job, ops in self._job_operations.items()}
+
+    @property
+    def objective(self) -> int:
+        '''
+        Objective of the rescheduled current solution,
+        None if it is not feasible.
+        '''
+        return self._objective if self._feasible else None
+
+    @property
+    def operations(self) -> List:
+        return self._operations
+
+    def schedule_of(self, i: int) -> Tuple[int, int, int]:
+        '''
+        (machine_id, start, end) of the operation of index i in the
+        rescheduled current solution
+        '''
+        return self._machine[i], self._start[i], self._end[i]
+
+    def release_of(self, i: int) -> int:
+        '''
+        Start time requested for the operation of index i
+        '''
+        return self._release[i]
+
+    def machine_sequence(self, machine_id: int) -> List[int]:
+        '''
+        Indexes of the operations of the machine, in order
+        '''
+        return self._sequences[machine_id]
+
+    def machine_predecessor(self, i: int) -> int:
+        '''
+        Index of the operation before i on its machine, -1 if i is the first one
+        '''
+        pos = self._position[i]
+        return self._sequences[self._machine[i]][pos - 1] if pos > 0 else -1
+
+    def job_predecessors(self, i: int) -> List[int]:
+        return self._predecessors[i]
+
+    def operation_index(self, operation) -> int:
+        '''
+        Returns the index of the operation (of any copy of the instance)
+        '''
+        return operation.index
+
+    def swap(self, op1, op2) -> int:
+        '''
+        Returns the objective of the solution where op1 and op2 exchange
+        their machine and start time, None if it is not feasible.
+        '''
+        i = self.operation_index(op1)
+        j = self.operation_index(op2)
+        return self.evaluate({i: (self._machine[j], self._release[j]),
+                              j: (self._machine[i], self._release[i])})
+
+    def shift(self, op, start_time: int) -> int:
+        '''
+        Returns the objective of the solution where op is requested
+        to start at start_time, None if it is not feasible.
+        '''
+        i = self.operation_index(op)
+        return self.evaluate({i: (self._machine[i], start_time)})
+
+    def evaluate(self, changes: Dict[int, Tuple[int, int]]) -> int:
+        '''
+        Returns the objective of the neighbor, None if it is not feasible.
+        @param changes: maps an operation index to its new (machine_id, start_time)
+        '''
+        for i, (machine_id, _) in changes.items():
+            if machine_id not in self._machines or not self._eligibility[i][machine_id]:
+                return None
+        if not self._feasible:
+            machine = self._machine.copy()
+            release = self._release.copy()
+            for i, (machine_id, start_time) in changes.items():
+                machine[i] = machine_id
+                release[i] = start_time
+            feasible, _, _, _, objective, _ = self._replay(machine, release)
+            return objective if feasible else None
+        return self._evaluate_delta(changes)
+
+    def _evaluate_delta(self, changes: Dict[int, Tuple[int, int]]) -> int:
+        rank = self._rank
+        machine = self._machine
+        operations = self._operations
+
+        # Machine sequences modified by the move
+        sequences = {}
+        first_change = {}
+        for i, (machine_id, _) in changes.items():
+            old_machine = machine[i]
+            if machine_id == old_machine:
+                continue
+            for m in (old_machine, machine_id):
+                if m not in sequences:
+                    sequences[m] = self._sequences[m].copy()
+            sequences[old_machine].remove(i)
+            insort(sequences[machine_id], i, key=lambda k: rank[k])
+            for m in (old_machine, machine_id):
+                first_change[m] = min(first_change.get(m, rank[i]), rank[i])
+        positions = {m: {k: pos for pos, k in enumerate(seq)} for m, seq in sequences.items()}
+
+        def machine_of(k):
+            return changes[k][0] if k in changes else machine[k]
+
+        heap = [rank[i] for i in changes]
+        for m, seq in sequences.items():
+            heap.extend(rank[k] for k in seq if rank[k] >= first_change[m])
+        heapq.heapify(heap)
+
+        start = {}
+        end = {}
+        queued = set(heap)
+        while heap:
+            r = heapq.heappop(heap)
+            queued.discard(r)
+            i = self._order[r]
+            m = machine_of(i)
+            release = changes[i][1] if i in changes else self._release[i]
+            if m in sequences:
+                seq = sequences[m]
+                pos = positions[m][i]
+            else:
+                seq = self._sequences[m]
+                pos = self._position[i]
+            mach = self._machines[m]
+            if pos == 0:
+                # The machine is started just before its first operation
+                op_start = max(release - mach.set_up_time, 0) + mach.set_up_time
+            else:
+                prev = seq[pos - 1]
+                op_start = max(release, end.get(prev, self._end[prev]))
+            for p in self._predecessors[i]:
+                if end.get(p, self._end[p]) > op_start:
+                    return None
+            op_end = op_start + operations[i]._machine_info[m][0]
+            if op_end > mach.latest_end:
+                return None
+            start[i] = op_start
+            end[i] = op_end
+            if op_end != self._end[i] or i in changes:
+                followers = self._successors[i].copy()
+                if pos + 1 < len(seq):
+                    followers.append(seq[pos + 1])
+                for k in followers:
+                    if rank[k] > r and rank[k] not in queued:
+                        queued.add(rank[k])
+                        heapq.heappush(heap, rank[k])
+
+        # Energy: operations that changed machine and power plans of the machines
+        # whose sequence or operation times changed
+        energy = self._energy
+        for i, (machine_id, _) in changes.items():
+            energy += operations[i]._machine_info[machine_id][1] - operations[i]._machine_info[machine[i]][1]
+        for m in set(sequences).union(machine_of(i) for i in end):
+            seq = sequences[m] if m in sequences else self._sequences[m]
+            intervals = [(start.get(k, self._start[k]), end.get(k, self._end[k])) for k in seq]
+            energy += self._machines[m].power_plan(intervals)[2] - self._power[m]
+
+        completion = 0
+        for job in {operations[i].job_id for i in end}:
+            new_completion = max(end.get(k, self._end[k]) for k in self._job_operations[job])
+            completion += new_completion - self._completion[job]
+        base_completion = self._objective - 2 * self._energy
+        return 2 * energy + base_completion + completion
+
+    def _replay(self, machine: List[int], release: List[int]):
+        '''
+        Reschedules every operation in order, following the rules of
+        Machine.add_operation, and computes the power plan of the machines
+        (see Machine.power_plan).
+        Returns (feasible, start times, end times, energy, objective,
+        energy of the power plan of each machine).
+        '''
+        operations = self._operations
+        start = [-1] * len(operations)
+        end = [-1] * len(operations)
+        last_end = {}
+        intervals = {m: [] for m in self._machines}
+        energy = 0
+        feasible = True
+        for i in self._order:
+            m = machine[i]
+            mach = self._machines.get(m)
+            if mach is None or not self._eligibility[i][m]:
+                feasible = False
+                continue
+            if m in last_end:
+                op_start = max(release[i], last_end[m])
+            else:
+                op_start = max(release[i] - mach.set_up_time, 0) + mach.set_up_time
+            if any(end[p] < 0 or end[p] > op_start for p in self._predecessors[i]):
+                feasible = False
+                continue
+            duration, op_energy = operations[i]._machine_info[m]
+            start[i] = op_start
+            end[i] = op_start + duration
+            last_end[m] = end[i]
+            intervals[m].append((start[i], end[i]))
+            energy += op_energy
+            if end[i] > mach.latest_end:
+                feasible = False
+        power = {m: self._machines[m].power_plan(intervals[m])[2] for m in self._machines}
+        energy += sum(power.values())
+        if not feasible:
+            return False, start, end, energy, None, power
+        objective = 2 * energy
+        for ops in self._job_operations.values():
+            objective += max(end[i] for i in ops)
+        return True, start, end, energy, objective, power
@@ -0,0 +1,210 @@
+'''
+List scheduling with dispatching rules.
+
+The operations are scheduled one at a time, following the Giffler and Thompson
+scheme: among the pairs (ready operation, machine that can execute it), the pair
+that would end first gives a machine and a time C*. The operations that could
+start on this machine before C* are in conflict and the dispatching rule chooses
+the one that is scheduled.
+The pairs are kept in a heap ordered by end time and the ready operations in one
+set per machine, so a step only looks at the operations of one machine.
+
+@author: Vassilissa Lehoux
+'''
+from typing import Dict
+import heapq
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.instance.machine import Machine
+from src.scheduling.instance.operation import Operation
+from src.scheduling.solution import Solution
+from src.scheduling.optim.heuristics import Heuristic, Budget
+
+
+class DispatchingRule(object):
+    '''
+    Chooses the operation to schedule among the operations in conflict
+    on a machine: the operation with the lowest priority is scheduled.
+    '''
+
+    def priority(self, operation: Operation, machine: Machine, start: int, end: int,
+                 scheduler: 'ListScheduling'):
+        '''
+        Returns the priority of the operation if it is scheduled on the
+        machine between start and end.
+        '''
+        raise NotImplementedError
+
+
+class ShortestProcessingTime(DispatchingRule):
+    '''
+    SPT: shortest operation first
+    '''
+
+    def priority(self, operation, machine, start, end, scheduler):
+        return end - start
+
+
+class LongestProcessingTime(DispatchingRule):
+    '''
+    LPT: longest operation first
+    '''
+
+    def priority(self, operation, machine, start, end, scheduler):
+        return start - end
+
+
+class MostWorkRemaining(DispatchingRule):
+    '''
+    MWKR: operation of the job with the most remaining work first
+    '''
+
+    def priority(self, operation, machine, start, end, scheduler):
+        return -scheduler.remaining_work(operation.job_id)
+
+
+class MinEnergy(DispatchingRule):
+    '''
+    Operation that increases the energy consumption of the machine the least first
+    '''
+
+    def priority(self, operation, machine, start, end, scheduler):
+        return operation.compute_cost(machine, start)
+
+
+class EarliestCompletion(DispatchingRule):
+    '''
+    ECT: operation that ends first
+    '''
+
+    def priority(self, operation, machine, start, end, scheduler):
+        return end
+
+
+DISPATCHING_RULES = {
+    'spt': ShortestProcessingTime,
+    'lpt': LongestProcessingTime,
+    'mwkr': MostWorkRemaining,
+    'min_energy': MinEnergy,
+    'ect': EarliestCompletion,
+}
+
+
+class ListScheduling(Heuristic):
+    '''
+    Deterministic list scheduling heuristic with a pluggable dispatching rule.
+    '''
+
+    def __init__(self, params: Dict=dict()):
+        '''
+        Constructor
+        @param params: The parameters of your heuristic method if any as a
+               dictionary. Implementation should provide default values in the function.
+        '''
+        self.params = params
+        self.solution = Solution
+        self._remaining_work = {}
+
+    def run(self, instance: Instance, params: Dict=dict()) -> Solution:
+        '''
+        Computes a solution for the given instance.
+        @param instance: the instance to solve
+        @param params: 'rule': name of a rule of DISPATCHING_RULES or a
+          DispatchingRule (default 'ect')
+          'callback' (see Budget) is called with the solution (the scheduling
+          is done in one pass)
+        '''
+        params = {**self.params, **params}
+        budget = Budget(params)
+        rule = params.get('rule', 'ect')
+        if not isinstance(rule, DispatchingRule):
+            if rule not in DISPATCHING_RULES:
+                raise ValueError(f"Unknown dispatching rule {rule}, expected one of {list(DISPATCHING_RULES)}")
+            rule = DISPATCHING_RULES[rule]()
+
+        self.solution = Solution(instance)
+        self._remaining_work = {}
+        for job in instance.jobs:
+            self._remaining_work[job.job_id] = sum(op.min_duration for op in job.operations_view)
+
+        # Version of each machine: a pair computed with an older version is outdated
+        version = {m.machine_id: 0 for m in instance.machines}
+        ready = {m.machine_id: {} for m in instance.machines}
+        heap = []
+
+        def push(op):
+            pairs = self._pairs(op)
+            for start, end, machine in pairs:
+                ready[machine.machine_id][op] = None
+                heapq.heappush(heap, (end, start, op.index, machine.machine_id, version[machine.machine_id]))
+
+        for op in self.solution.available_operations:
+            push(op)
+        while heap:
+            end, start, index, machine_id, machine_version = heapq.heappop(heap)
+            op = instance.operations[index]
+            if op.assigned:
+                continue
+            if machine_version != version[machine_id]:
+                # The machine changed since the pair was computed
+                machine = instance.get_machine(machine_id)
+                start, end = self._start_and_end(op, machine)
+                heapq.heappush(heap, (end, start, index, machine_id, version[machine_id]))
+                continue
+
+            # Operations in conflict on the machine
+            machine = instance.get_machine(machine_id)
+            chosen = None
+            for candidate in ready[machine_id]:
+                candidate_start, candidate_end = self._start_and_end(candidate, machine)
+                if candidate_start < end or candidate is op:
+                    key = (rule.priority(candidate, machine, candidate_start, candidate_end, self),
+                           candidate_end, candidate.index)
+                    if chosen is None or key < chosen[0]:
+                        chosen = (key, candidate)
+            chosen = chosen[1]
+
+            self.solution.schedule(chosen, machine)
+            version[machine_id] += 1
+            for machine_ready in ready.values():
+                machine_ready.pop(chosen, None)
+            self._remaining_work[chosen.job_id] -= chosen.min_duration
+            for succ in chosen.successors:
+                if self.solution.is_available(succ):
+                    push(succ)
+            if chosen is not op:
+                # The pair of op is outdated and will be recomputed
+                heapq.heappush(heap, (end, start, index, machine_id, machine_version))
+
+        self.solution.optimize_power()
+        budget.improved(self.solution)
+        return self.solution
+
+    def remaining_work(self, job_id: int) -> int:
+        '''
+        Minimal processing time of the operations of the job that are not scheduled yet.
+        '''
+        return self._remaining_work[job_id]
+
+    def _start_and_end(self, operation: Operation, machine: Machine):
+        '''
+        Start and end time given by Solution.schedule
+        '''
+        min_start = operation.min_start_time
+        if machine.start_times_view:
+            start = max(min_start, machine.available_time)
+        else:
+            start = max(min_start, machine.set_up_time)
+        return start, start + operation._machine_info[machine.machine_id][0]
+
+    def _pairs(self, operation: Operation):
+        '''
+        Machines on which the operation can be scheduled, with its start and end time.
+        The machines on which it would end too late are only kept if there is no other one.
+        '''
+        pairs = []
+        for machine_id, _, _ in operation.machine_options:
+            machine = self.solution.inst.get_machine(machine_id)
+            pairs.append((*self._start_and_end(operation, machine), machine))
+        in_time = [pair for pair in pairs if pair[1] <= pair[2].latest_end]
+        return in_time if in_time else pairs
@@ -3,12 +3,120 @@ Mother class for heuristics.
 
 @author: Vassilissa Lehoux
 '''
-from typing import Dict
+from typing import Dict, List, Tuple
+import random
+import time
 
 from src.scheduling.instance.instance import Instance
 from src.scheduling.solution import Solution
 
 
+def make_rng(params: Dict):
+    '''
+    Returns the random generator of a run and the seed used to create it.
+    @param params: params['rng'] can be a random.Random or a numpy Generator,
+      otherwise a random.Random is seeded with params['seed'], or with a seed
+      drawn at random if no seed is given. The seed is None when the generator
+      is given, as it cannot be known.
+    '''
+    rng = params.get('rng')
+    if rng is None:
+        seed = params.get('seed')
+        if seed is None:
+            seed = random.randrange(2**32)
+        return random.Random(seed), seed
+    if isinstance(rng, random.Random):
+        return rng, None
+    # numpy Generator: a random.Random is derived from it
+    return random.Random(int(rng.integers(2**63))), None
+
+
+class Budget(object):
+    '''
+    Budget of a run, given by the parameters of the heuristics:
+      'time_limit' (default None): maximal duration of the run in seconds
+      'max_iterations': maximal number of iterations (the default depends on the heuristic)
+      'callback' (default None): function(solution, objective, elapsed) called
+        each time the best solution improves, elapsed being the time in seconds
+        since the beginning of the run. The solution may be modified by the rest
+        of the run: the callback has to copy it to keep it.
+      'target_gap' (default 0): the budget is exhausted once the gap between the
+        best solution and the lower bound of the instance (see LowerBounds.gap)
+        is at most target_gap. With 0, the run stops when the solution is optimal.
+    The improvements are also kept as (elapsed, objective) pairs.
+    '''
+    __slots__ = ('start', 'deadline', 'max_iterations', 'iterations', 'callback',
+                 'improvements', 'best_objective', 'target_gap', 'gap')
+
+    def __init__(self, params: Dict, max_iterations: int = None):
+        self.start = time.perf_counter()
+        time_limit = params.get('time_limit')
+        self.deadline = None if time_limit is None else self.start + time_limit
+        self.max_iterations = params.get('max_iterations', max_iterations)
+        self.iterations = 0
+        self.callback = params.get('callback')
+        self.improvements: List[Tuple[float, int]] = []
+        self.best_objective = None
+        self.target_gap = params.get('target_gap', 0.0)
+        # Gap of the best solution, None until a solution is reported
+        self.gap = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def expired(self) -> bool:
+        if self.gap is not None and self.gap <= self.target_gap:
+            return True
+        if self.max_iterations is not None and self.iterations >= self.max_iterations:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    @property
+    def progress(self) -> float:
+        '''
+        Fraction of the budget used, between 0 and 1
+        (0 if the budget is not bounded)
+        '''
+        progress = 0.0
+        if self.max_iterations:
+            progress = self.iterations / self.max_iterations
+        if self.deadline is not None and self.deadline > self.start:
+            progress = max(progress, self.elapsed / (self.deadline - self.start))
+        return min(progress, 1.0)
+
+    def next_iteration(self) -> bool:
+        '''
+        Counts an iteration. Returns False, without counting it,
+        if the budget is exhausted.
+        '''
+        if self.expired:
+            return False
+        self.iterations += 1
+        return True
+
+    def improved(self, solution: Solution, objective: int = None) -> bool:
+        '''
+        Reports a solution. It is recorded, and given to the callback, if it is
+        feasible and better than the best solution reported.
+        @param objective: objective of the solution (default solution.objective)
+        '''
+        if objective is None:
+            if not solution.is_feasible:
+                return False
+            objective = solution.objective
+        if self.best_objective is not None and objective >= self.best_objective:
+            return False
+        self.best_objective = objective
+        self.gap = solution.inst.lower_bounds().gap(objective)
+        elapsed = self.elapsed
+        self.improvements.append((elapsed, objective))
+        if self.callback is not None:
+            self.callback(solution, objective, elapsed)
+        return True
+
+
 class Heuristic(object):
     '''
     classdocs
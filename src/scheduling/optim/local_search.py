@@ -6,7 +6,7 @@ then improve it.
 '''
 from typing import Dict
 
-from src.scheduling.optim.heuristics import Heuristic
+from src.scheduling.optim.heuristics import Heuristic, Budget, make_rng
 from src.scheduling.instance.instance import Instance
 from src.scheduling.solution import Solution
 from src.scheduling.optim.constructive import NonDeterminist
@@ -21,7 +21,7 @@ class FirstNeighborLocalSearch(Heuristic):
     The first solution found that improves over the current solution
     replaces it.
     The algorithm stops when no solution is better than the current solution
-    in its neighborhood.
+    in its neighborhood, or when its budget is exhausted.
     '''
 
     def __init__(self, params: Dict = dict()):
@@ -29,22 +29,36 @@ class FirstNeighborLocalSearch(Heuristic):
         Constructor
         '''
         self.params = params
+        self.seed = None
+        self.iterations = 0
+        self.improvements = []
 
     def run(self, instance: Instance, InitClass, NeighborClass, params: Dict = dict()) -> Solution:
         '''
         Compute a solution for the given instance.
+        @param params: 'seed' or 'rng' (see make_rng) for the initial solution.
+          The seed used is kept in self.seed to replay the run.
+          'max_iterations' (default None: until a local optimum), 'time_limit',
+          'target_gap' and 'callback' (see Budget)
         '''
+        params = {**self.params, **params}
+        rng, self.seed = make_rng(params)
+        budget = Budget(params)
+        self.improvements = budget.improvements
         # Initial solution
         init_heur = InitClass()
-        current_solution = init_heur.run(instance)
+        current_solution = init_heur.run(instance, {'rng': rng})
+        budget.improved(current_solution)
         neighborhood = NeighborClass(instance)
         improved = True
-        while improved:
+        while improved and budget.next_iteration():
             improved = False
             neighbor = neighborhood.first_better_neighbor(current_solution)
             if neighbor is not current_solution and neighbor.objective < current_solution.objective:
                 current_solution = neighbor
                 improved = True
+                budget.improved(current_solution)
+        self.iterations = budget.iterations
         return current_solution
 
 
@@ -56,7 +70,7 @@ class BestNeighborLocalSearch(Heuristic):
     The best solution found that improves over the current solution
     replaces it.
     The algorithm stops when no solution is better than the current solution
-    in its neighborhood.
+    in its neighborhood, or when its budget is exhausted.
     '''
 
     def __init__(self, params: Dict = dict()):
@@ -64,18 +78,30 @@ class BestNeighborLocalSearch(Heuristic):
         Constructor
         '''
         self.params = params
+        self.seed = None
+        self.iterations = 0
+        self.improvements = []
 
     def run(self, instance: Instance, InitClass, NeighborClass=None, params: Dict = dict()) -> Solution:
         '''
         Computes a solution for the given instance.
+        @param params: 'seed' or 'rng' (see make_rng) for the initial solution.
+          The seed used is kept in self.seed to replay the run.
+          'max_iterations' (default None: until a local optimum), 'time_limit',
+          'target_gap' and 'callback' (see Budget)
         '''
         from src.scheduling.optim.neighborhoods import MyNeighborhood1, MyNeighborhood2
+        params = {**self.params, **params}
+        rng, self.seed = make_rng(params)
+        budget = Budget(params)
+        self.improvements = budget.improvements
         # Initial solution
         init_heur = InitClass()
-        current_solution = init_heur.run(instance)
+        current_solution = init_heur.run(instance, {'rng': rng})
+        budget.improved(current_solution)
         neighborhoods = [MyNeighborhood1(instance), MyNeighborhood2(instance)]
         improved = True
-        while improved:
+        while improved and budget.next_iteration():
             improved = False
             best_neighbor = current_solution
             for neighborhood in neighborhoods:
@@ -85,6 +111,8 @@ class BestNeighborLocalSearch(Heuristic):
             if best_neighbor is not current_solution:
                 current_solution = best_neighbor
                 improved = True
+                budget.improved(current_solution)
+        self.iterations = budget.iterations
         return current_solution
 
 
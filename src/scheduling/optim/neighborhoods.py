@@ -4,10 +4,11 @@ They must derive from the Neighborhood class.
 
 @author: Vassilissa Lehoux
 '''
-from typing import Dict
+from typing import Dict, List, Tuple
 
 from src.scheduling.instance.instance import Instance
 from src.scheduling.solution import Solution
+from src.scheduling.optim.delta_evaluation import DeltaEvaluator
 
 
 class Neighborhood(object):
@@ -51,76 +52,81 @@ class SwapNeighborhood(Neighborhood):
 
     def best_neighbor(self, sol: Solution) -> Solution:
         '''
-        Returns the best solution in the neighborhood of the solution.
-        Can be the solution itself.
+        Returns the best solution in the neighborhood of the solution
+        (one scan of the swaps). Can be the solution itself.
         '''
-        prev_sol = sol
-        while True:
-            next_sol = self.first_better_neighbor(prev_sol)
-            if next_sol == prev_sol:
-                return prev_sol
-            prev_sol = next_sol
+        if not sol.is_feasible:
+            return sol
+        evaluator = DeltaEvaluator(sol)
+        best_swap = None
+        best_objective = sol.objective
+        for op1, op2 in self._swaps(sol):
+            objective = evaluator.swap(op1, op2)
+            if objective is not None and objective < best_objective:
+                best_swap = (op1, op2)
+                best_objective = objective
+        if best_swap is None:
+            return sol
+        return self._swap_operations(sol, *best_swap)
 
     def first_better_neighbor(self, sol: Solution) -> Solution:
         '''
         Returns the first solution in the neighborhood of the solution
         that improves other it and the solution itself if none is better.
         '''
-        ops = [op for op in sol.all_operations if op.assigned]
-        for i in range(len(ops)):
-            for j in range(i+1, len(ops)):
-                op1, op2 = ops[i], ops[j]
-                m1, m2 = op1.assigned_to, op2.assigned_to
-                if m1 == m2:
-                    continue
-                if m2 in op1._machine_info and m1 in op2._machine_info:
-                    new_sol = self._swap_operations(sol, op1, op2)
-                    if new_sol and new_sol.is_feasible and new_sol.objective < sol.objective:
-                        return new_sol
+        if not sol.is_feasible:
+            return sol
+        # Moves are evaluated incrementally, the solution is only copied
+        # for the move that is accepted
+        evaluator = DeltaEvaluator(sol)
+        for op1, op2 in self._swaps(sol):
+            objective = evaluator.swap(op1, op2)
+            if objective is not None and objective < sol.objective:
+                return self._swap_operations(sol, op1, op2)
         return sol
 
+    def _swaps(self, sol: Solution):
+        '''
+        Pairs of scheduled operations whose machines can be swapped,
+        in the order of operations.
+        '''
+        eligibility = sol.inst.eligibility
+        for op1 in sol.all_operations:
+            if not op1.assigned:
+                continue
+            m1 = op1.assigned_to
+            can_move = eligibility[op1.index]
+            # Only the operations that can go on the machine of op1 are tried,
+            # in the order of operations
+            for op2 in sol.inst.eligible_operations(m1):
+                if op2.index <= op1.index or not op2.assigned:
+                    continue
+                m2 = op2.assigned_to
+                if m1 == m2 or not can_move[m2]:
+                    continue
+                yield op1, op2
+
+    def random_move(self, evaluator: DeltaEvaluator, rng) -> Dict[int, Tuple[int, int]]:
+        '''
+        Draws a swap at random, as changes for evaluator.evaluate.
+        Returns None if the two operations drawn cannot be swapped.
+        '''
+        i, j = rng.sample(range(len(evaluator.operations)), 2)
+        m1 = evaluator.schedule_of(i)[0]
+        m2 = evaluator.schedule_of(j)[0]
+        eligibility = self._instance.eligibility
+        if m1 == m2 or not eligibility[i][m2] or not eligibility[j][m1]:
+            return None
+        return {i: (m2, evaluator.release_of(j)), j: (m1, evaluator.release_of(i))}
+
     def _swap_operations(self, sol: Solution, op1, op2):
-        from copy import deepcopy
-        new_sol = deepcopy(sol)
-        # 1. Gather execution order for each machine
-        op_schedule = {}  # op_id -> (machine_id, start_time)
-        for machine in new_sol.inst.machines:
-            for op in machine.scheduled_operations:
-                op_schedule[(op.job_id, op.operation_id)] = (machine.machine_id, op.start_time)
-
-        # 2. Swap machine and time for op1 and op2
+        new_sol = sol.copy()
+        op_schedule = _schedule_of(new_sol)
+        # Swap machine and time for op1 and op2
         key1 = (op1.job_id, op1.operation_id)
         key2 = (op2.job_id, op2.operation_id)
-        m1, t1 = op_schedule[key1]
-        m2, t2 = op_schedule[key2]
-        op_schedule[key1] = (m2, t2)
-        op_schedule[key2] = (m1, t1)
-
-        # 3. Build the ordered list of all operations (as in constructive)
-        all_ops = new_sol.all_operations
-        operation_in_order_of_execution = {}
-        max_nb_op = 0
-        for operation in all_ops:
-            pred_count = len(operation.predecessors)
-            if pred_count in operation_in_order_of_execution:
-                operation_in_order_of_execution[pred_count].append(operation)
-            else:
-                operation_in_order_of_execution[pred_count] = [operation]
-            max_nb_op = max(max_nb_op, pred_count)
-        list_ordered = []
-        for i in range(max_nb_op+1):
-            if i in operation_in_order_of_execution:
-                list_ordered += operation_in_order_of_execution[i]
-
-        # 4. Reset solution and reschedule all operations in order
-        new_sol.reset()
-        for op in list_ordered:
-            key = (op.job_id, op.operation_id)
-            if key in op_schedule:
-                machine_id, start_time = op_schedule[key]
-                machine = new_sol.inst.get_machine(machine_id)
-                op.schedule(machine_id, start_time)
-                machine.add_operation(op, start_time)
+        op_schedule[key1], op_schedule[key2] = op_schedule[key2], op_schedule[key1]
+        _reschedule(new_sol, op_schedule)
         return new_sol
 
 
@@ -133,69 +139,255 @@ class ShiftNeighborhood(Neighborhood):
         super().__init__(instance, params)
 
     def best_neighbor(self, sol: Solution) -> Solution:
-        prev_sol = sol
-        while True:
-            next_sol = self.first_better_neighbor(prev_sol)
-            if next_sol == prev_sol:
-                return prev_sol
-            prev_sol = next_sol
+        '''
+        Returns the best solution in the neighborhood of the solution
+        (one scan of the shifts). Can be the solution itself.
+        '''
+        if not sol.is_feasible:
+            return sol
+        snapshot = sol.snapshot()
+        best_shift = None
+        best_objective = sol.objective
+        for op in sol.all_operations:
+            if not op.assigned:
+                continue
+            for delta in [-1, 1]:
+                self._shift_in_place(sol, op, delta)
+                if sol.is_feasible and sol.objective < best_objective:
+                    best_shift = (op, delta)
+                    best_objective = sol.objective
+                sol.restore(snapshot)
+        if best_shift is None:
+            return sol
+        return self._shift_operation(sol, *best_shift)
 
     def first_better_neighbor(self, sol: Solution) -> Solution:
+        if not sol.is_feasible:
+            return sol
+        # Each move is tried on the solution itself, which is then restored:
+        # the solution is only copied for the move that is accepted
+        snapshot = sol.snapshot()
+        objective = sol.objective
         for op in sol.all_operations:
             if not op.assigned:
                 continue
             for delta in [-1, 1]:
-                new_sol = self._shift_operation(sol, op, delta)
-                if new_sol and new_sol.is_feasible and new_sol.objective < sol.objective:
+                self._shift_in_place(sol, op, delta)
+                if sol.is_feasible and sol.objective < objective:
+                    new_sol = sol.copy()
+                    sol.restore(snapshot)
                     return new_sol
+                sol.restore(snapshot)
         return sol
 
+    def random_move(self, evaluator: DeltaEvaluator, rng) -> Dict[int, Tuple[int, int]]:
+        '''
+        Draws a shift of one time unit at random, as changes for evaluator.evaluate.
+        Returns None if the operation cannot move.
+        '''
+        i = rng.randrange(len(evaluator.operations))
+        machine_id, start, _ = evaluator.schedule_of(i)
+        min_start = max((evaluator.schedule_of(p)[2] for p in evaluator.job_predecessors(i)), default=0)
+        new_start = max(start + rng.choice([-1, 1]), min_start)
+        if new_start == evaluator.release_of(i):
+            return None
+        return {i: (machine_id, new_start)}
+
     def _shift_operation(self, sol: Solution, op, delta):
-        from copy import deepcopy
-        new_sol = deepcopy(sol)
-        # 1. Gather execution order for each machine
-        op_schedule = {}  # (job_id, op_id) -> (machine_id, start_time)
-        for machine in new_sol.inst.machines:
-            for opx in machine.scheduled_operations:
-                op_schedule[(opx.job_id, opx.operation_id)] = (machine.machine_id, opx.start_time)
-
-        # 2. Change the start time of op by delta
+        new_sol = sol.copy()
+        self._shift_in_place(new_sol, new_sol.inst.get_operation((op.job_id, op.operation_id)), delta)
+        return new_sol
+
+    def _shift_in_place(self, sol: Solution, op, delta):
+        '''
+        Changes the start time of op by delta (not before its predecessors end)
+        and schedules again the operations of the solution.
+        '''
+        op_schedule = _schedule_of(sol)
         key = (op.job_id, op.operation_id)
         if key in op_schedule:
             machine_id, start_time = op_schedule[key]
-            new_start_time = start_time + delta
-            # Ensure new_start_time is not before min_start_time
-            min_start_time = op.min_start_time
-            new_start_time = max(new_start_time, min_start_time)
+            new_start_time = max(start_time + delta, op.min_start_time)
             op_schedule[key] = (machine_id, new_start_time)
+        _reschedule(sol, op_schedule)
 
-        # 3. Build the ordered list of all operations (as in constructive)
-        all_ops = new_sol.all_operations
-        operation_in_order_of_execution = {}
-        max_nb_op = 0
-        for operation in all_ops:
-            pred_count = len(operation.predecessors)
-            if pred_count in operation_in_order_of_execution:
-                operation_in_order_of_execution[pred_count].append(operation)
-            else:
-                operation_in_order_of_execution[pred_count] = [operation]
-            max_nb_op = max(max_nb_op, pred_count)
-        list_ordered = []
-        for i in range(max_nb_op+1):
-            if i in operation_in_order_of_execution:
-                list_ordered += operation_in_order_of_execution[i]
-
-        # 4. Reset solution and reschedule all operations in order
-        new_sol.reset()
-        for opx in list_ordered:
-            keyx = (opx.job_id, opx.operation_id)
-            if keyx in op_schedule:
-                machine_id, start_time = op_schedule[keyx]
-                machine = new_sol.inst.get_machine(machine_id)
-                opx.schedule(machine_id, start_time)
-                machine.add_operation(opx, start_time)
+
+class CriticalPathNeighborhood(Neighborhood):
+    '''
+    Voisinage restreint aux mouvements qui peuvent améliorer l'objectif.
+    Le graphe de la solution (arcs de job et arcs de machine) donne pour chaque
+    job le chemin critique qui fixe sa date de fin, et les blocs : opérations
+    consécutives du chemin sur une même machine. Les mouvements sont :
+    - avancer une opération du chemin à la fin de ses prédécesseurs ;
+    - réaffecter une opération d'un bloc à une autre machine ;
+    - pour l'énergie, réaffecter les opérations qui bordent un temps mort
+      à une machine où elles consomment moins, et vider les machines qui
+      n'exécutent qu'une opération.
+    L'ordre des opérations sur une machine étant celui de la reconstruction
+    (nombre de prédécesseurs), les échanges dans un bloc (N5/N7) n'y changent
+    rien : les blocs sont cassés par réaffectation.
+    '''
+
+    def __init__(self, instance: Instance, params: Dict = dict()):
+        super().__init__(instance, params)
+
+    def best_neighbor(self, sol: Solution) -> Solution:
+        if not sol.is_feasible:
+            return sol
+        evaluator = DeltaEvaluator(sol)
+        best_changes = None
+        best_objective = sol.objective
+        for changes in self.moves(evaluator):
+            objective = evaluator.evaluate(changes)
+            if objective is not None and objective < best_objective:
+                best_changes = changes
+                best_objective = objective
+        if best_changes is None:
+            return sol
+        return self._apply(sol, evaluator, best_changes)
+
+    def first_better_neighbor(self, sol: Solution) -> Solution:
+        if not sol.is_feasible:
+            return sol
+        evaluator = DeltaEvaluator(sol)
+        for changes in self.moves(evaluator):
+            objective = evaluator.evaluate(changes)
+            if objective is not None and objective < sol.objective:
+                return self._apply(sol, evaluator, changes)
+        return sol
+
+    def critical_paths(self, evaluator: DeltaEvaluator) -> List[List[Tuple[int, bool]]]:
+        '''
+        For each job, the operations (indexes) of the path that ends with its
+        last operation, from the end, with True when the operation is reached
+        by a machine arc (it waits for the operation before it on its machine).
+        '''
+        last = {}
+        for i, op in enumerate(evaluator.operations):
+            if op.job_id not in last or evaluator.schedule_of(i)[2] > evaluator.schedule_of(last[op.job_id])[2]:
+                last[op.job_id] = i
+        paths = []
+        for i in last.values():
+            path = []
+            machine_arc = False
+            while i != -1:
+                path.append((i, machine_arc))
+                start = evaluator.schedule_of(i)[1]
+                following = -1
+                machine_arc = False
+                for p in evaluator.job_predecessors(i):
+                    if evaluator.schedule_of(p)[2] == start:
+                        following = p
+                if following == -1:
+                    p = evaluator.machine_predecessor(i)
+                    if p != -1 and evaluator.schedule_of(p)[2] == start:
+                        following = p
+                        machine_arc = True
+                i = following
+            paths.append(path)
+        return paths
+
+    def moves(self, evaluator: DeltaEvaluator) -> List[Dict[int, Tuple[int, int]]]:
+        '''
+        Candidate moves, as changes for DeltaEvaluator.evaluate
+        '''
+        if evaluator.objective is None:
+            return []
+        operations = evaluator.operations
+        moves = {}
+
+        def add(i, machine_id, start):
+            if (machine_id, start) != (evaluator.schedule_of(i)[0], evaluator.release_of(i)):
+                moves.setdefault((i, machine_id, start), {i: (machine_id, start)})
+
+        def job_ready(i):
+            return max((evaluator.schedule_of(p)[2] for p in evaluator.job_predecessors(i)), default=0)
+
+        for path in self.critical_paths(evaluator):
+            for k, (i, machine_arc) in enumerate(path):
+                machine_id, start, _ = evaluator.schedule_of(i)
+                # Left shift to the end of the predecessors
+                previous = evaluator.machine_predecessor(i)
+                machine_ready = (evaluator.schedule_of(previous)[2] if previous != -1
+                                 else self._instance.get_machine(machine_id).set_up_time)
+                earliest = max(job_ready(i), machine_ready)
+                if earliest < start:
+                    add(i, machine_id, earliest)
+                # Operations of a block: i waits for the previous operation of the
+                # path on its machine, or the next one waits for i
+                in_block = machine_arc or (k > 0 and path[k - 1][1])
+                if in_block:
+                    for other, _, _ in operations[i].machine_options:
+                        if other != machine_id:
+                            add(i, other, job_ready(i))
+
+        # Energy: operations around idle times and machines with one operation
+        for machine in self._instance.machines:
+            sequence = evaluator.machine_sequence(machine.machine_id)
+            for pos, i in enumerate(sequence):
+                start, end = evaluator.schedule_of(i)[1:]
+                idle_before = pos > 0 and evaluator.schedule_of(sequence[pos - 1])[2] < start
+                idle_after = pos + 1 < len(sequence) and evaluator.schedule_of(sequence[pos + 1])[1] > end
+                if not (idle_before or idle_after or len(sequence) == 1):
+                    continue
+                energy = operations[i]._machine_info[machine.machine_id][1]
+                if len(sequence) > 1 and operations[i].min_energy >= energy:
+                    # No machine consumes less for the operation
+                    continue
+                for other, _, other_energy in operations[i].machine_options:
+                    if other == machine.machine_id:
+                        continue
+                    if other_energy < energy or (len(sequence) == 1 and evaluator.machine_sequence(other)):
+                        add(i, other, evaluator.release_of(i))
+        return list(moves.values())
+
+    def _apply(self, sol: Solution, evaluator: DeltaEvaluator, changes: Dict[int, Tuple[int, int]]) -> Solution:
+        new_sol = sol.copy()
+        apply_changes(new_sol, evaluator, changes)
         return new_sol
 
+
+def apply_changes(sol: Solution, evaluator: DeltaEvaluator, changes: Dict[int, Tuple[int, int]]):
+    '''
+    Applies the move evaluated by evaluator.evaluate(changes) to the solution,
+    in place: its objective is then the one given by the evaluator.
+    '''
+    op_schedule = _schedule_of(sol)
+    for i, (machine_id, start) in changes.items():
+        op = evaluator.operations[i]
+        op_schedule[(op.job_id, op.operation_id)] = (machine_id, start)
+    _reschedule(sol, op_schedule)
+
+
+def _schedule_of(sol: Solution) -> Dict:
+    '''
+    (job_id, op_id) -> (machine_id, start_time) of the scheduled operations
+    '''
+    op_schedule = {}
+    for machine in sol.inst.machines:
+        for op in machine.scheduled_operations_view:
+            op_schedule[(op.job_id, op.operation_id)] = (machine.machine_id, op.start_time)
+    return op_schedule
+
+
+def _reschedule(sol: Solution, op_schedule: Dict):
+    '''
+    Resets the solution and schedules the operations of op_schedule, in the
+    topological order of the instance (as in constructive), on their machine
+    at their start time or as soon as possible after.
+    '''
+    sol.reset()
+    for op in sol.inst.topological_order:
+        key = (op.job_id, op.operation_id)
+        if key in op_schedule:
+            machine_id, start_time = op_schedule[key]
+            machine = sol.inst.get_machine(machine_id)
+            op.schedule(machine_id, start_time)
+            machine.add_operation(op, start_time)
+    sol.optimize_power()
+
+
 # Aliases for use in local search
 MyNeighborhood1 = SwapNeighborhood
 MyNeighborhood2 = ShiftNeighborhood
+MyNeighborhood3 = CriticalPathNeighborhood
@@ -0,0 +1,421 @@
+'''
+Disjunctive graph of a schedule.
+
+The nodes are the operations, the arcs are the precedences of the jobs and the
+sequences of the operations on the machines. Each operation starts as early as
+the arcs allow (semi-active schedule): its head is the longest path from the
+beginning of the schedule to its start, and its tail the longest path from its
+end to the end of the schedule.
+
+After a move, the heads and tails are only recomputed from the operations whose
+arcs changed, following a topological order of the graph that is maintained
+incrementally (Pearce and Kelly, "A dynamic topological sort algorithm for
+directed acyclic graphs", 2006), so a move costs O(affected operations) and not
+a reschedule of every operation.
+
+@author: Vassilissa Lehoux
+'''
+from typing import Dict, Iterable, List
+import heapq
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.solution import Solution
+
+
+class ScheduleGraph(object):
+    '''
+    Disjunctive graph of the operations of an instance, with the heads and tails
+    of the semi-active schedule of the machine sequences.
+    The operations are designated by their index in instance.operations.
+    '''
+
+    def __init__(self, instance: Instance, sequences: Dict[int, List[int]]):
+        '''
+        Constructor
+        @param sequences: indexes of the operations of each machine, in order.
+          Every operation must be on one machine that can execute it.
+        '''
+        self._instance = instance
+        self._operations = instance.operations
+        n = len(self._operations)
+        self._machines = {m.machine_id: m for m in instance.machines}
+        self._eligibility = instance.eligibility
+        self._job_predecessors = [[p.index for p in op.predecessors] for op in self._operations]
+        self._job_successors = [[s.index for s in op.successors] for op in self._operations]
+        # Last operation of each job: its end is the completion time of the job
+        self._last_of_job = {}
+        for i, op in enumerate(self._operations):
+            if not self._job_successors[i]:
+                self._last_of_job[op.job_id] = i
+
+        # Machine sequences as linked lists
+        self._machine = [-1] * n
+        self._prev = [-1] * n
+        self._next = [-1] * n
+        self._first = {m: -1 for m in self._machines}
+        for machine_id, sequence in sequences.items():
+            prev = -1
+            for i in sequence:
+                if self._machine[i] != -1:
+                    raise ValueError(f"Operation {self._operations[i]} is on several machines")
+                if machine_id not in self._machines or not self._eligibility[i][machine_id]:
+                    raise ValueError(f"Machine {machine_id} cannot execute operation {self._operations[i]}")
+                self._machine[i] = machine_id
+                self._prev[i] = prev
+                if prev == -1:
+                    self._first[machine_id] = i
+                else:
+                    self._next[prev] = i
+                prev = i
+        if -1 in self._machine:
+            raise ValueError("Every operation should be on a machine")
+        self._duration = [op._machine_info[self._machine[i]][0] for i, op in enumerate(self._operations)]
+        self._operation_energy = sum(op._machine_info[self._machine[i]][1]
+                                     for i, op in enumerate(self._operations))
+
+        self._order = self._topological_order()
+        self._head = [0] * n
+        self._tail = [0] * n
+        for i in sorted(range(n), key=self._order.__getitem__):
+            self._head[i] = self._compute_head(i)
+        for i in sorted(range(n), key=self._order.__getitem__, reverse=True):
+            self._tail[i] = self._compute_tail(i)
+        self._completion = {job: self._head[i] + self._duration[i] for job, i in self._last_of_job.items()}
+        self._sum_completion = sum(self._completion.values())
+        self._power = {m: self._power_of(m) for m in self._machines}
+
+    @classmethod
+    def from_solution(cls, sol: Solution) -> 'ScheduleGraph':
+        '''
+        Graph of the machine sequences of a solution in which every operation is scheduled.
+        '''
+        sequences = {m.machine_id: [op.index for op in sorted(m.scheduled_operations_view,
+                                                               key=lambda op: op.start_time)]
+                     for m in sol.inst.machines}
+        return cls(sol.inst, sequences)
+
+    def machine_of(self, i: int) -> int:
+        return self._machine[i]
+
+    def sequence(self, machine_id: int) -> List[int]:
+        '''
+        Indexes of the operations of the machine, in order
+        '''
+        sequence = []
+        i = self._first[machine_id]
+        while i != -1:
+            sequence.append(i)
+            i = self._next[i]
+        return sequence
+
+    def head(self, i: int) -> int:
+        '''
+        Start time of the operation of index i
+        '''
+        return self._head[i]
+
+    def tail(self, i: int) -> int:
+        '''
+        Length of the longest path from the end of the operation of index i
+        to the end of the schedule
+        '''
+        return self._tail[i]
+
+    def end(self, i: int) -> int:
+        return self._head[i] + self._duration[i]
+
+    def is_critical(self, i: int) -> bool:
+        '''
+        True if the operation of index i is on a longest path (it cannot be
+        delayed without delaying the end of the schedule)
+        '''
+        return self._head[i] + self._duration[i] + self._tail[i] == self.makespan
+
+    @property
+    def makespan(self) -> int:
+        return max(self._completion.values(), default=0)
+
+    @property
+    def sum_completion(self) -> int:
+        return self._sum_completion
+
+    @property
+    def energy(self) -> int:
+        '''
+        Energy of the operations and of the power plans of the machines
+        (see Machine.power_plan)
+        '''
+        return self._operation_energy + sum(self._power.values())
+
+    @property
+    def objective(self) -> int:
+        '''
+        Objective of the schedule, as in Solution.objective
+        '''
+        return 2 * self.energy + self._sum_completion
+
+    @property
+    def is_feasible(self) -> bool:
+        '''
+        True if every machine ends its operations in time to be torn down
+        before its end time
+        '''
+        for machine_id, machine in self._machines.items():
+            i = self._first[machine_id]
+            last = -1
+            while i != -1:
+                last = i
+                i = self._next[i]
+            if last != -1 and self.end(last) > machine.latest_end:
+                return False
+        return True
+
+    def move(self, i: int, machine_id: int, after: int = -1) -> bool:
+        '''
+        Moves the operation of index i on the machine, just after the operation
+        of index after (-1: first operation of the machine), and updates the
+        heads and tails of the operations whose schedule changes.
+        Returns False, without changing the graph, if the machine cannot execute
+        the operation or if the move creates a cycle.
+        '''
+        if machine_id not in self._machines or not self._eligibility[i][machine_id] or after == i:
+            return False
+        if after != -1 and self._machine[after] != machine_id:
+            raise ValueError(f"Operation {after} is not on machine {machine_id}")
+        old_machine, old_prev, old_next = self._machine[i], self._prev[i], self._next[i]
+        if old_machine == machine_id and old_prev == after:
+            return True
+
+        self._unlink(i)
+        if not self._insert(i, machine_id, after):
+            self._insert(i, old_machine, old_prev)
+            return False
+        new_next = self._next[i]
+
+        duration, energy = self._operations[i]._machine_info[machine_id]
+        self._operation_energy += energy - self._operations[i]._machine_info[old_machine][1]
+        self._duration[i] = duration
+        changed_machines = {old_machine, machine_id}
+        changed = self._update_heads([i, old_next, new_next], i)
+        changed_machines.update(self._machine[k] for k in changed)
+        for k in changed + [i]:
+            job = self._operations[k].job_id
+            if self._last_of_job[job] == k:
+                completion = self._head[k] + self._duration[k]
+                self._sum_completion += completion - self._completion[job]
+                self._completion[job] = completion
+        self._update_tails([i, old_prev, self._prev[i]], i)
+        for m in changed_machines:
+            self._power[m] = self._power_of(m)
+        return True
+
+    def apply(self, sol: Solution):
+        '''
+        Schedules the operations of the solution (on a copy of the instance or not)
+        at their head on their machine, and computes the power plan of the machines.
+        '''
+        sol.reset()
+        operations = sol.inst.operations
+        for i in sorted(range(len(operations)), key=self._order.__getitem__):
+            op = operations[i]
+            machine_id = self._machine[i]
+            op.schedule(machine_id, self._head[i])
+            sol.inst.get_machine(machine_id).add_operation(op, self._head[i])
+        sol.optimize_power()
+
+    def _successors(self, i: int) -> Iterable[int]:
+        if self._next[i] != -1:
+            return self._job_successors[i] + [self._next[i]]
+        return self._job_successors[i]
+
+    def _predecessors(self, i: int) -> Iterable[int]:
+        if self._prev[i] != -1:
+            return self._job_predecessors[i] + [self._prev[i]]
+        return self._job_predecessors[i]
+
+    def _compute_head(self, i: int) -> int:
+        # The first operation of a machine starts after its set up
+        head = self._machines[self._machine[i]].set_up_time if self._prev[i] == -1 else 0
+        for p in self._predecessors(i):
+            head = max(head, self._head[p] + self._duration[p])
+        return head
+
+    def _compute_tail(self, i: int) -> int:
+        tail = 0
+        for s in self._successors(i):
+            tail = max(tail, self._duration[s] + self._tail[s])
+        return tail
+
+    def _power_of(self, machine_id: int) -> int:
+        intervals = [(self._head[i], self._head[i] + self._duration[i]) for i in self.sequence(machine_id)]
+        return self._machines[machine_id].power_plan(intervals)[2]
+
+    def _topological_order(self) -> List[int]:
+        '''
+        Position of each operation in a topological order of the graph (Kahn)
+        '''
+        n = len(self._operations)
+        in_degree = [len(self._predecessors(i)) for i in range(n)]
+        ready = [i for i in range(n) if in_degree[i] == 0]
+        order = [-1] * n
+        position = 0
+        while ready:
+            i = ready.pop()
+            order[i] = position
+            position += 1
+            for s in self._successors(i):
+                in_degree[s] -= 1
+                if in_degree[s] == 0:
+                    ready.append(s)
+        if position < n:
+            raise ValueError("The machine sequences and the jobs create a cycle")
+        return order
+
+    def _unlink(self, i: int):
+        '''
+        Removes the operation from its machine sequence.
+        The arc between its neighbors keeps the topological order valid.
+        '''
+        prev, next_ = self._prev[i], self._next[i]
+        if prev == -1:
+            self._first[self._machine[i]] = next_
+        else:
+            self._next[prev] = next_
+        if next_ != -1:
+            self._prev[next_] = prev
+        self._prev[i] = self._next[i] = -1
+
+    def _insert(self, i: int, machine_id: int, after: int) -> bool:
+        '''
+        Inserts the operation in the machine sequence after the operation after
+        (-1: first) and restores the topological order, one new arc at a time.
+        Returns False, with the operation left out of the sequences, if the
+        insertion creates a cycle.
+        '''
+        next_ = self._first[machine_id] if after == -1 else self._next[after]
+        self._machine[i] = machine_id
+        # Arc after -> i, the machine successor being detached for now
+        self._prev[i] = after
+        if after == -1:
+            self._first[machine_id] = i
+        else:
+            self._next[after] = i
+        if next_ != -1:
+            self._prev[next_] = -1
+        if after != -1 and not self._add_arc(after, i):
+            self._unlink(i)
+            self._reattach(next_, after)
+            return False
+        # Arc i -> next
+        if next_ != -1:
+            self._next[i] = next_
+            self._prev[next_] = i
+            if not self._add_arc(i, next_):
+                self._unlink(i)
+                return False
+        return True
+
+    def _reattach(self, next_: int, prev: int):
+        if next_ != -1:
+            self._prev[next_] = prev
+            if prev != -1:
+                self._next[prev] = next_
+            else:
+                self._first[self._machine[next_]] = next_
+
+    def _add_arc(self, x: int, y: int) -> bool:
+        '''
+        Pearce-Kelly: the arc x -> y is in the graph and every other arc follows
+        the topological order. If y is before x, the operations reachable from y
+        and the operations that reach x, between the positions of y and x, are
+        reordered. Returns False if y reaches x (cycle), without reordering.
+        '''
+        order = self._order
+        lower, upper = order[y], order[x]
+        if lower > upper:
+            return True
+        forward = []
+        visited = {y}
+        stack = [y]
+        while stack:
+            k = stack.pop()
+            forward.append(k)
+            for s in self._successors(k):
+                if s == x:
+                    return False
+                if s not in visited and order[s] <= upper:
+                    visited.add(s)
+                    stack.append(s)
+        backward = []
+        visited = {x}
+        stack = [x]
+        while stack:
+            k = stack.pop()
+            backward.append(k)
+            for p in self._predecessors(k):
+                if p not in visited and order[p] >= lower:
+                    visited.add(p)
+                    stack.append(p)
+        backward.sort(key=order.__getitem__)
+        forward.sort(key=order.__getitem__)
+        nodes = backward + forward
+        for k, position in zip(nodes, sorted(order[k] for k in nodes)):
+            order[k] = position
+        return True
+
+    def _update_heads(self, seeds: List[int], moved: int) -> List[int]:
+        '''
+        Recomputes the heads from the seeds, in topological order, following the
+        arcs only where the end of an operation changes.
+        Returns the operations whose head changed.
+        '''
+        order = self._order
+        heap = [(order[k], k) for k in set(seeds) if k != -1]
+        heapq.heapify(heap)
+        queued = {k for _, k in heap}
+        changed = []
+        while heap:
+            _, k = heapq.heappop(heap)
+            head = self._compute_head(k)
+            if head == self._head[k] and k != moved:
+                continue
+            if head != self._head[k]:
+                self._head[k] = head
+                changed.append(k)
+            for s in self._successors(k):
+                if s not in queued:
+                    queued.add(s)
+                    heapq.heappush(heap, (order[s], s))
+        return changed
+
+    def _update_tails(self, seeds: List[int], moved: int):
+        '''
+        Recomputes the tails from the seeds, in reverse topological order,
+        following the arcs backward only where the tail (or the duration) of
+        an operation changes.
+        '''
+        order = self._order
+        heap = [(-order[k], k) for k in set(seeds) if k != -1]
+        heapq.heapify(heap)
+        queued = {k for _, k in heap}
+        while heap:
+            _, k = heapq.heappop(heap)
+            tail = self._compute_tail(k)
+            if tail == self._tail[k] and k != moved:
+                continue
+            self._tail[k] = tail
+            for p in self._predecessors(k):
+                if p not in queued:
+                    queued.add(p)
+                    heapq.heappush(heap, (-order[p], p))
+
+
+if __name__ == "__main__":
+    # To play with the graph
+    from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+    from src.scheduling.optim.constructive import NonDeterminist
+    import os
+    inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp10")
+    sol = NonDeterminist().run(inst, {'seed': 0})
+    graph = ScheduleGraph.from_solution(sol)
+    print(sol.objective, graph.objective, graph.makespan)
@@ -0,0 +1,204 @@
+'''
+Simulated annealing.
+
+@author: Vassilissa Lehoux
+'''
+from typing import Dict
+import math
+import statistics
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.solution import Solution
+from src.scheduling.optim.heuristics import Heuristic, Budget, make_rng
+from src.scheduling.optim.constructive import NonDeterminist
+from src.scheduling.optim.delta_evaluation import DeltaEvaluator
+from src.scheduling.optim.neighborhoods import SwapNeighborhood, ShiftNeighborhood, apply_changes
+
+
+def geometric_cooling(t0: float, t1: float, progress: float) -> float:
+    return t0 * (t1 / t0) ** progress
+
+
+def linear_cooling(t0: float, t1: float, progress: float) -> float:
+    return t0 + (t1 - t0) * progress
+
+
+def logarithmic_cooling(t0: float, t1: float, progress: float) -> float:
+    '''
+    Slow decrease at the end of the search
+    '''
+    return t1 + (t0 - t1) * (1 - math.log1p(progress * (math.e - 1)))
+
+
+# Temperature at a progress between 0 (beginning) and 1 (end of the budget),
+# from the initial temperature t0 to the final temperature t1
+COOLING_SCHEDULES = {
+    'geometric': geometric_cooling,
+    'linear': linear_cooling,
+    'logarithmic': logarithmic_cooling,
+}
+
+
+class SimulatedAnnealing(Heuristic):
+    '''
+    Simulated annealing over the moves of the swap and shift neighborhoods.
+    At each iteration, a move is drawn at random and evaluated incrementally
+    (the current solution is only rebuilt when a move is accepted). A move that
+    degrades the objective by delta is accepted with probability exp(-delta/T)
+    (Metropolis rule). The temperature T decreases with the progress of the
+    search, the fraction of the time limit or of the iterations used, so the
+    search adapts to the budget given.
+    If the best solution does not improve during 'reheat_after' iterations, the
+    search restarts from it with a new cooling, from a lower initial temperature.
+    The best solution found is returned.
+    '''
+
+    def __init__(self, params: Dict = dict()):
+        '''
+        Constructor
+        @param params: default parameters of the runs (see run)
+        '''
+        self.params = params
+        self.solution = Solution
+        self.seed = None
+        self.iterations = 0
+        self.reheats = 0
+        self.improvements = []
+
+    def run(self, instance: Instance, params: Dict = dict()) -> Solution:
+        '''
+        Computes a solution for the given instance.
+        @param params: the parameters for the run:
+          'seed' or 'rng' (see make_rng). The seed used is kept in self.seed.
+          'init' (default NonDeterminist): heuristic class of the initial solution
+          'neighborhoods' (default [SwapNeighborhood, ShiftNeighborhood]): classes
+            of the neighborhoods, that must provide random_move
+          'max_iterations' (default 10000), 'time_limit', 'target_gap' and 'callback'
+            (see Budget): the temperature decreases with the fraction of the budget used
+          'initial_temperature' (default None): by default, the temperature at which
+            the median degradation of some random moves is accepted with probability 1/2
+          'final_temperature' (default 0.01)
+          'cooling' (default 'geometric'): name of a schedule of COOLING_SCHEDULES
+            or function(t0, t1, progress) returning the temperature
+          'reheat_after' (default None): iterations without improvement of the best
+            solution before a reheat (None: no reheat)
+          'reheat_ratio' (default 0.5): initial temperature of a new cooling,
+            relatively to the previous one
+          'attempts' (default 20): number of random moves drawn at each iteration
+            until one gives a feasible solution
+        '''
+        params = {**self.params, **params}
+        rng, self.seed = make_rng(params)
+        budget = Budget(params, 10000)
+        final_temperature = params.get('final_temperature', 0.01)
+        initial_temperature = params.get('initial_temperature')
+        for name, temperature in [('initial', initial_temperature), ('final', final_temperature)]:
+            if temperature is not None and temperature <= 0:
+                raise ValueError(f"The {name} temperature should be positive, got {temperature}")
+        cooling = params.get('cooling', 'geometric')
+        if not callable(cooling):
+            if cooling not in COOLING_SCHEDULES:
+                raise ValueError(f"Unknown cooling schedule {cooling}, expected one of {list(COOLING_SCHEDULES)}")
+            cooling = COOLING_SCHEDULES[cooling]
+        reheat_after = params.get('reheat_after')
+        reheat_ratio = params.get('reheat_ratio', 0.5)
+        attempts = params.get('attempts', 20)
+
+        current = params.get('init', NonDeterminist)().run(instance, {'rng': rng})
+        # As in TabuSearch, the search starts from the rebuilt initial solution
+        evaluator = DeltaEvaluator(current)
+        if evaluator.objective is not None:
+            apply_changes(current, evaluator, {})
+            evaluator = DeltaEvaluator(current)
+        neighborhoods = [N(instance) for N in params.get('neighborhoods', [SwapNeighborhood, ShiftNeighborhood])]
+        objective = evaluator.objective
+        best = current.snapshot()
+        best_objective = objective
+        budget.improved(current, best_objective)
+        self.improvements = budget.improvements
+
+        t0 = initial_temperature
+        if t0 is None:
+            t0 = self._initial_temperature(evaluator, neighborhoods, rng)
+        t1 = min(final_temperature, t0)
+        cycle_start = 0.0
+        last_improvement = 0
+
+        self.iterations = 0
+        self.reheats = 0
+        while not budget.expired:
+            progress = budget.progress
+            budget.next_iteration()
+            self.iterations = budget.iterations
+
+            if reheat_after is not None and self.iterations - last_improvement > reheat_after:
+                # New cooling from the best solution
+                self.reheats += 1
+                last_improvement = self.iterations
+                cycle_start = progress
+                t0 = max(t0 * reheat_ratio, t1)
+                current.restore(best)
+                evaluator = DeltaEvaluator(current)
+                objective = best_objective
+            temperature = cooling(t0, t1, (progress - cycle_start) / (1 - cycle_start) if cycle_start < 1 else 1)
+
+            changes, new_objective = self._feasible_move(evaluator, neighborhoods, rng, attempts)
+            if changes is None:
+                continue
+            delta = new_objective - objective if objective is not None else -1
+            if delta > 0 and rng.random() >= math.exp(-delta / max(temperature, 1e-9)):
+                continue
+            apply_changes(current, evaluator, changes)
+            evaluator = DeltaEvaluator(current)
+            objective = new_objective
+            if best_objective is None or objective < best_objective:
+                best = current.snapshot()
+                best_objective = objective
+                last_improvement = self.iterations
+                budget.improved(current, objective)
+
+        current.restore(best)
+        self.solution = current
+        return current
+
+    def _feasible_move(self, evaluator: DeltaEvaluator, neighborhoods, rng, attempts: int):
+        '''
+        Draws random moves until one gives a feasible solution.
+        Returns the changes and the objective of the move, or (None, None).
+        '''
+        for _ in range(attempts):
+            changes = rng.choice(neighborhoods).random_move(evaluator, rng)
+            if changes is None:
+                continue
+            objective = evaluator.evaluate(changes)
+            if objective is not None:
+                return changes, objective
+        return None, None
+
+    def _initial_temperature(self, evaluator: DeltaEvaluator, neighborhoods, rng, samples: int = 100) -> float:
+        '''
+        Temperature at which the median degradation of random moves
+        is accepted with probability 1/2
+        '''
+        if evaluator.objective is None:
+            return 1.0
+        degradations = []
+        for _ in range(samples):
+            changes = rng.choice(neighborhoods).random_move(evaluator, rng)
+            if changes is None:
+                continue
+            objective = evaluator.evaluate(changes)
+            if objective is not None and objective > evaluator.objective:
+                degradations.append(objective - evaluator.objective)
+        if not degradations:
+            return 1.0
+        return statistics.median(degradations) / math.log(2)
+
+
+if __name__ == "__main__":
+    # To play with the heuristic
+    from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+    import os
+    inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp10")
+    sol = SimulatedAnnealing().run(inst, {'seed': 0, 'time_limit': 5})
+    print(sol.objective)
@@ -0,0 +1,117 @@
+'''
+Tabu search.
+
+@author: Vassilissa Lehoux
+'''
+from typing import Dict
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.solution import Solution
+from src.scheduling.optim.heuristics import Heuristic, Budget, make_rng
+from src.scheduling.optim.constructive import NonDeterminist
+from src.scheduling.optim.delta_evaluation import DeltaEvaluator
+from src.scheduling.optim.neighborhoods import SwapNeighborhood, ShiftNeighborhood, apply_changes
+
+
+class TabuSearch(Heuristic):
+    '''
+    Tabu search over the moves of the swap and shift neighborhoods.
+    At each iteration, a sample of moves is drawn from the neighborhoods and
+    evaluated incrementally. The best move that is not tabu is applied, even if
+    it degrades the solution. When an operation leaves a (machine, start time),
+    going back to it is tabu for 'tenure' iterations, unless the move gives a
+    solution better than the best one found (aspiration).
+    The best solution found is returned.
+    '''
+
+    def __init__(self, params: Dict = dict()):
+        '''
+        Constructor
+        @param params: default parameters of the runs (see run)
+        '''
+        self.params = params
+        self.solution = Solution
+        self.seed = None
+        self.iterations = 0
+        self.improvements = []
+
+    def run(self, instance: Instance, params: Dict = dict()) -> Solution:
+        '''
+        Computes a solution for the given instance.
+        @param params: the parameters for the run:
+          'seed' or 'rng' (see make_rng). The seed used is kept in self.seed.
+          'init' (default NonDeterminist): heuristic class of the initial solution
+          'neighborhoods' (default [SwapNeighborhood, ShiftNeighborhood]): classes
+            of the neighborhoods, that must provide random_move
+          'max_iterations' (default 1000), 'time_limit', 'target_gap' and 'callback' (see Budget)
+          'candidates' (default 50): number of moves drawn at each iteration
+          'tenure' (default 10): number of iterations during which a move back is tabu
+        '''
+        params = {**self.params, **params}
+        rng, self.seed = make_rng(params)
+        budget = Budget(params, 1000)
+        candidates = params.get('candidates', 50)
+        tenure = params.get('tenure', 10)
+        if tenure < 1:
+            raise ValueError(f"The tenure should be at least 1, got {tenure}")
+
+        current = params.get('init', NonDeterminist)().run(instance, {'rng': rng})
+        # The moves give solutions rebuilt operation by operation (see apply_changes),
+        # which can differ from the initial solution if it was built in another order:
+        # the search starts from the rebuilt initial solution to compare them
+        evaluator = DeltaEvaluator(current)
+        if evaluator.objective is not None:
+            apply_changes(current, evaluator, {})
+        neighborhoods = [N(instance) for N in params.get('neighborhoods', [SwapNeighborhood, ShiftNeighborhood])]
+        best = current.snapshot()
+        best_objective = current.objective if current.is_feasible else None
+        budget.improved(current, best_objective)
+        self.improvements = budget.improvements
+        # (operation index, machine, start time) -> last iteration during which it is tabu
+        tabu = {}
+
+        self.iterations = 0
+        while budget.next_iteration():
+            iteration = self.iterations
+            self.iterations = budget.iterations
+            if iteration % tenure == 0:
+                tabu = {attribute: end for attribute, end in tabu.items() if end >= iteration}
+
+            evaluator = DeltaEvaluator(current)
+            move = None
+            for _ in range(candidates):
+                changes = rng.choice(neighborhoods).random_move(evaluator, rng)
+                if changes is None:
+                    continue
+                objective = evaluator.evaluate(changes)
+                if objective is None or (move is not None and objective >= move[0]):
+                    continue
+                aspiration = best_objective is None or objective < best_objective
+                if not aspiration and any(tabu.get((i, machine_id, start), -1) >= iteration
+                                          for i, (machine_id, start) in changes.items()):
+                    continue
+                move = (objective, changes)
+            if move is None:
+                continue
+
+            objective, changes = move
+            for i in changes:
+                tabu[(i, evaluator.schedule_of(i)[0], evaluator.release_of(i))] = iteration + tenure
+            apply_changes(current, evaluator, changes)
+            if best_objective is None or objective < best_objective:
+                best = current.snapshot()
+                best_objective = objective
+                budget.improved(current, objective)
+
+        current.restore(best)
+        self.solution = current
+        return current
+
+
+if __name__ == "__main__":
+    # To play with the heuristic
+    from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+    import os
+    inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp10")
+    sol = TabuSearch().run(inst, {'seed': 0, 'time_limit': 5})
+    print(sol.objective)
@@ -3,41 +3,136 @@ Object containing the solution to the optimization problem.
 
 @author: Vassilissa Lehoux
 '''
-from typing import List
+from typing import Dict, List, Tuple
+from copy import deepcopy
 from src.scheduling.instance.instance import Instance
 from src.scheduling.instance.operation import Operation
 
 from src.scheduling.instance.machine import Machine
-from matplotlib import pyplot as plt
-from matplotlib import colormaps
+
+
+class SolutionEvaluation(object):
+    '''
+    Evaluation of a solution.
+    Computed once and kept by the solution until its schedule changes.
+    '''
+
+    def __init__(self, feasible: bool, energy: int, sum_ci: int, cmax: int):
+        self.feasible = feasible
+        self.energy = energy
+        self.sum_ci = sum_ci
+        self.cmax = cmax
+
+
+class SolutionSnapshot(object):
+    '''
+    Immutable copy of the schedule of a solution, restored by Solution.restore.
+    Operations and machines are given by their index in the instance lists,
+    so a snapshot can be restored in a copy of the solution.
+    '''
+    __slots__ = ('machines', 'starts', 'machine_operations', 'machine_start_times', 'machine_stop_times',
+                 'machine_energy', 'evaluation')
+
+    def __init__(self, machines: Tuple[int, ...], starts: Tuple[int, ...],
+                 machine_operations: Tuple[Tuple[int, ...], ...], machine_start_times: Tuple[Tuple[int, ...], ...],
+                 machine_stop_times: Tuple[Tuple[int, ...], ...], machine_energy: Tuple[int, ...],
+                 evaluation: SolutionEvaluation = None):
+        '''
+        @param machines: machine of each operation, -1 if it is not scheduled
+        @param starts: start time of each operation, -1 if it is not scheduled
+        @param machine_operations: operations scheduled on each machine, in order
+        @param evaluation: evaluation of the solution if it was computed
+        '''
+        self.machines = machines
+        self.starts = starts
+        self.machine_operations = machine_operations
+        self.machine_start_times = machine_start_times
+        self.machine_stop_times = machine_stop_times
+        self.machine_energy = machine_energy
+        self.evaluation = evaluation
+
 
 class Solution(object):
     def __init__(self, instance: Instance):
         self._instance = instance
+        self._evaluation = None
+        # Operations ready to be scheduled (dict used as an ordered set)
+        self._frontier = None
+        self._scheduling = False
+        # Hook of the machines. A new solution on the same instance replaces it:
+        # the solution then takes it back when it is used (see _claim)
+        self._on_change = self._invalidate
         for op in self._instance.operations:
             op.reset()
         for m in self._instance.machines:
             m.reset()
+            m._on_change = self._on_change
 
     @property
     def inst(self) -> Instance:
         return self._instance
 
     def reset(self):
+        self._claim()
         for op in self._instance.operations:
             op.reset()
         for m in self._instance.machines:
             m.reset()
+        self._invalidate()
+
+    def _claim(self):
+        '''
+        Binds the machines to the solution again if another solution was
+        created on the same instance since. The schedule of the instance may
+        then have changed without notice, so the cached values are dropped.
+        '''
+        machines = self._instance.machines
+        if machines and machines[0]._on_change is not self._on_change:
+            for m in machines:
+                m._on_change = self._on_change
+            self._evaluation = None
+            self._frontier = None
+
+    def _invalidate(self):
+        '''
+        Marks the cached evaluation as dirty.
+        Called by the machines when their schedule changes.
+        The ready operations are recomputed if the change does not come from
+        Solution.schedule, which updates them itself.
+        '''
+        self._evaluation = None
+        if not self._scheduling:
+            self._frontier = None
+
+    @property
+    def evaluation(self) -> SolutionEvaluation:
+        '''
+        Returns the evaluation of the solution, computed
+        only if the solution changed since the last call.
+        '''
+        self._claim()
+        if self._evaluation is None:
+            self._evaluation = self._compute_evaluation()
+        return self._evaluation
+
+    def _compute_evaluation(self) -> SolutionEvaluation:
+        feasible = all(op.assigned for op in self._instance.operations)
+        if feasible:
+            for machine in self._instance.machines:
+                for op in machine._scheduled_operations:
+                    if op.end_time > machine.latest_end or op.start_time < machine.set_up_time:
+                        feasible = False
+                        break
+                if not feasible:
+                    break
+        energy = sum(m.total_energy_consumption for m in self._instance.machines)
+        completion_times = [job.completion_time for job in self._instance.jobs]
+        return SolutionEvaluation(feasible, energy, sum(completion_times),
+                                  max(completion_times, default=0))
 
     @property
     def is_feasible(self) -> bool:
-        if not all(op.assigned for op in self._instance.operations):
-            return False
-        for machine in self._instance.machines:
-            for op in machine.scheduled_operations:
-                if op.end_time > machine._end_time:
-                    return False
-        return True
+        return self.evaluation.feasible
 
     @property
     def evaluate(self) -> int:
@@ -47,18 +142,17 @@ class Solution(object):
 
     @property
     def objective(self) -> int:
-        if not self.is_feasible:
+        evaluation = self.evaluation
+        if not evaluation.feasible:
             raise Exception("Solution is not feasible")
-        total = self.total_energy_consumption*2
-        for job in self._instance.jobs:
-            total += job.completion_time
-        return total
+        return evaluation.energy*2 + evaluation.sum_ci
 
     @property
     def cmax(self) -> int:
-        if not self.is_feasible:
+        evaluation = self.evaluation
+        if not evaluation.feasible:
             raise Exception("Solution is not feasible")
-        return max(job.completion_time for job in self._instance.jobs)
+        return evaluation.cmax
 
     @property
     def sum_ci(self) -> int:
@@ -66,9 +160,10 @@ class Solution(object):
 
     @property
     def total_energy_consumption(self) -> int:
-        if not self.is_feasible:
+        evaluation = self.evaluation
+        if not evaluation.feasible:
             raise Exception("Solution is not feasible")
-        return sum(m.total_energy_consumption for m in self._instance.machines)
+        return evaluation.energy
 
     def __str__(self) -> str:
         return ""
@@ -79,39 +174,117 @@ class Solution(object):
     def from_csv(self, inst_folder, operation_file, machine_file):
         raise NotImplementedError
 
+    def _ready_operations(self) -> Dict[Operation, None]:
+        self._claim()
+        if self._frontier is None:
+            self._frontier = {}
+            for op in self._instance.operations:
+                if not op.assigned and all(pred.assigned for pred in op.predecessors):
+                    self._frontier[op] = None
+        return self._frontier
+
     @property
     def available_operations(self) -> List[Operation]:
-        avail = []
-        for op in self._instance.operations:
-            if not op.assigned:
-                ready = True
-                for pred in op.predecessors:
-                    if not pred.assigned:
-                        ready = False
-                        break
-                if ready:
-                    avail.append(op)
-        return avail
+        return list(self._ready_operations())
+
+    def is_available(self, operation: Operation) -> bool:
+        '''
+        Returns True if the operation is not scheduled and all its
+        predecessors are.
+        '''
+        return operation in self._ready_operations()
 
     @property
     def all_operations(self) -> List[Operation]:
         return self._instance.operations.copy()
 
+    def snapshot(self) -> SolutionSnapshot:
+        '''
+        Returns an immutable copy of the schedule, to try changes on the
+        solution and go back to it with restore.
+        '''
+        self._claim()
+        operations = self._instance.operations
+        machines = self._instance.machines
+        return SolutionSnapshot(
+            tuple(op.assigned_to for op in operations),
+            tuple(op.start_time for op in operations),
+            tuple(tuple(op.index for op in m._scheduled_operations) for m in machines),
+            tuple(tuple(m._start_times) for m in machines),
+            tuple(tuple(m._stop_times) for m in machines),
+            tuple(m._current_energy for m in machines),
+            self._evaluation)
+
+    def restore(self, snapshot: SolutionSnapshot):
+        '''
+        Puts back the schedule of the snapshot, taken on this solution
+        or on a copy of it.
+        '''
+        self._claim()
+        operations = self._instance.operations
+        machines = self._instance.machines
+        if len(snapshot.machines) != len(operations) or len(snapshot.machine_energy) != len(machines):
+            raise ValueError("Snapshot of a solution of another instance")
+        for op, machine_id, start in zip(operations, snapshot.machines, snapshot.starts):
+            if machine_id == -1:
+                op.reset()
+            else:
+                op.schedule(machine_id, start, check_success=False)
+        for k, machine in enumerate(machines):
+            # In place, the views of the lists stay valid
+            machine._scheduled_operations[:] = [operations[i] for i in snapshot.machine_operations[k]]
+            machine._start_times[:] = snapshot.machine_start_times[k]
+            machine._stop_times[:] = snapshot.machine_stop_times[k]
+            machine._current_energy = snapshot.machine_energy[k]
+        self._frontier = None
+        self._evaluation = snapshot.evaluation
+
+    def copy(self, into: 'Solution' = None) -> 'Solution':
+        '''
+        Returns a copy of the solution, on its own copy of the instance.
+        @param into: solution on a copy of the instance (made by copy) that is
+          not used any more: the schedule is restored in it instead of copying
+          the whole instance.
+        '''
+        if into is None:
+            return deepcopy(self)
+        into.restore(self.snapshot())
+        return into
+
     def schedule(self, operation: Operation, machine: Machine):
-        assert operation in self.available_operations
+        assert self.is_available(operation)
+        self._scheduling = True
+        try:
+            self._schedule_on_machine(operation, machine)
+        except BaseException:
+            # Interrupted (e.g. by a time limit): the ready operations are recomputed
+            self._frontier = None
+            raise
+        finally:
+            self._scheduling = False
+            self._evaluation = None
+        if operation.assigned:
+            # Successors whose predecessors are all scheduled become ready
+            del self._frontier[operation]
+            for succ in operation.successors:
+                if not succ.assigned and all(pred.assigned for pred in succ.predecessors):
+                    self._frontier[succ] = None
+
+    def _schedule_on_machine(self, operation: Operation, machine: Machine):
         earliest = operation.min_start_time
 
-        if not machine.start_times:
+        if not machine.start_times_view:
             machine.add_operation(operation, earliest)
             machine._stop_times.append(machine._end_time)
             machine._current_energy += machine._tear_down_energy
             return
 
-        if machine.stop_times:
+        if machine.stop_times_view:
             machine._current_energy -= machine._tear_down_energy
             machine._stop_times.pop()
 
-        last_op = machine.scheduled_operations[-1] if machine.scheduled_operations else None
+        operations = machine.scheduled_operations_view
+        last_op = operations[-1] if operations else None
         last_op_end = last_op.end_time if last_op else 0
         new_op_start = max(earliest, machine.available_time)
         tear_down_and_up_time = machine.tear_down_time+machine.set_up_time
@@ -135,15 +308,28 @@ class Solution(object):
         machine._stop_times.append(machine._end_time)
         machine._current_energy += machine._tear_down_energy
 
+    def optimize_power(self):
+        '''
+        Post-pass once every operation is scheduled: the start and stop times of
+        each machine are replaced by the energy-optimal plan for its sequence of
+        operations (see Machine.power_plan). The operations do not move.
+        '''
+        for machine in self._instance.machines:
+            machine.optimize_power()
+
     def gantt(self, colormapname):
         """
         Generate a plot of the planning.
         Standard colormaps can be found at https://matplotlib.org/stable/users/explain/colors/colormaps.html
+        matplotlib is only imported here: it takes longer to import than the rest of the package.
         """
+        from matplotlib import pyplot as plt
+        from matplotlib import colormaps
+
         fig, ax = plt.subplots()
         colormap = colormaps[colormapname]
         for machine in self.inst.machines:
-            machine_operations = sorted(machine.scheduled_operations, key=lambda op: op.start_time)
+            machine_operations = sorted(machine.scheduled_operations_view, key=lambda op: op.start_time)
             for operation in machine_operations:
                 operation_start = operation.start_time
                 operation_end = operation.end_time
@@ -175,7 +361,7 @@ class Solution(object):
                 )
             set_up_time = machine.set_up_time
             tear_down_time = machine.tear_down_time
-            for (start, stop) in zip(machine.start_times, machine.stop_times):
+            for (start, stop) in zip(machine.start_times_view, machine.stop_times_view):
                 start_label = "set up"
                 stop_label = "tear down"
                 ax.broken_barh(
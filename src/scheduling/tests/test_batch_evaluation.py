@@ -0,0 +1,84 @@
+'''
+Tests for the BatchEvaluator class.
+
+@author: Vassilissa Lehoux
+'''
+import unittest
+import os
+import random
+
+import numpy as np
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.optim.batch_evaluation import BatchEvaluator
+from src.scheduling.solution import Solution
+from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+
+
+class TestBatchEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+        self.compact = self.inst.to_arrays()
+        self.rng = random.Random(0)
+
+    def random_candidate(self):
+        '''
+        Random eligible assignment and random order compatible with the jobs
+        '''
+        c = self.compact
+        assignment = [self.rng.choice(np.flatnonzero(c.eligible[row])) for row in range(c.nb_operations)]
+        next_op = list(c.job_offsets[:-1])
+        sequence = []
+        while len(sequence) < c.nb_operations:
+            job = self.rng.choice([j for j in range(c.nb_jobs) if next_op[j] < c.job_offsets[j + 1]])
+            sequence.append(next_op[job])
+            next_op[job] += 1
+        return assignment, sequence
+
+    def solution_evaluation(self, assignment, sequence):
+        c = self.compact
+        sol = Solution(self.inst)
+        for row in sequence:
+            op = self.inst.get_operation((int(c.job_ids[row]), int(c.operation_ids[row])))
+            sol.schedule(op, self.inst.machines[assignment[row]])
+        sol.optimize_power()
+        return sol.evaluation
+
+    def test_matches_solution(self):
+        candidates = [self.random_candidate() for _ in range(20)]
+        result = BatchEvaluator(self.compact).evaluate(np.array([a for a, _ in candidates]),
+                                                       np.array([s for _, s in candidates]))
+        self.assertEqual(len(result), 20)
+        for k, (assignment, sequence) in enumerate(candidates):
+            evaluation = self.solution_evaluation(assignment, sequence)
+            self.assertEqual(bool(result.feasible[k]), evaluation.feasible, 'wrong feasibility')
+            self.assertEqual(result.energy[k], evaluation.energy, 'wrong energy')
+            self.assertEqual(result.sum_ci[k], evaluation.sum_ci, 'wrong sum of completion times')
+            self.assertEqual(result.cmax[k], evaluation.cmax, 'wrong cmax')
+            self.assertEqual(result.objective[k], evaluation.energy * 2 + evaluation.sum_ci, 'wrong objective')
+
+    def test_precedence_violation(self):
+        assignment, sequence = self.random_candidate()
+        # Second operation of the first job scheduled before the first one
+        bad_order = sequence.copy()
+        i, j = bad_order.index(0), bad_order.index(1)
+        bad_order[i], bad_order[j] = bad_order[j], bad_order[i]
+        result = BatchEvaluator(self.compact).evaluate(np.array([assignment, assignment]),
+                                                       np.array([sequence, bad_order]))
+        self.assertFalse(result.feasible[1], 'precedence constraint should be checked')
+
+    def test_ineligible_machine(self):
+        self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp72")
+        self.compact = self.inst.to_arrays()
+        assignment, sequence = self.random_candidate()
+        row, col = np.argwhere(~self.compact.eligible)[0]
+        bad_machine = assignment.copy()
+        bad_machine[row] = col
+        result = BatchEvaluator(self.compact).evaluate(np.array([assignment, bad_machine]),
+                                                       np.array([sequence, sequence]))
+        self.assertFalse(result.feasible[1], 'eligibility should be checked')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+'''
+Tests of the benchmark.
+
+@author: Vassilissa Lehoux
+'''
+import unittest
+import os
+import tempfile
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.bench.benchmark import (run_once, run_benchmark, instance_folders, save_json, save_csv,
+                                            load_results, compare)
+from src.scheduling.bench.importtime import measure_import
+from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+
+
+def record(time=1.0, objective=100, feasible=True, error=None, seed=0):
+    return {'instance': 'jsp1', 'heuristic': 'non_det', 'seed': seed, 'time': time, 'peak_memory': 1000,
+            'objective': objective, 'lower_bound': 50, 'gap': None if objective is None else 0.5,
+            'feasible': feasible, 'error': error}
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "jsp1")
+
+    def test_run_once(self):
+        result = run_once(self.inst, 'non_det', 3)
+        self.assertIsNone(result['error'])
+        self.assertTrue(result['feasible'])
+        self.assertGreater(result['time'], 0)
+        self.assertGreater(result['peak_memory'], 0)
+        self.assertEqual(result['lower_bound'], self.inst.lower_bounds().objective)
+        self.assertAlmostEqual(result['gap'], 1 - result['lower_bound'] / result['objective'])
+        self.assertEqual(run_once(self.inst, 'non_det', 3, memory=False)['objective'], result['objective'],
+                         'same seed should give the same objective')
+
+    def test_run_benchmark(self):
+        folders = instance_folders(TEST_FOLDER_DATA)
+        records = run_benchmark(folders, ['greedy', 'non_det'], [0, 1], memory=False)
+        self.assertEqual(len(records), len(folders) * 3, 'deterministic heuristics should run once')
+
+    def test_save_and_load(self):
+        records = [record(), record(objective=None, feasible=False, error="Exception()", seed=1)]
+        with tempfile.TemporaryDirectory() as folder:
+            for name, save in [('results.json', save_json), ('results.csv', save_csv)]:
+                path = os.path.join(folder, name)
+                save(records, path)
+                self.assertEqual(load_results(path), records)
+
+    def test_compare(self):
+        self.assertEqual(compare([record()], [record()]), [])
+        self.assertEqual(len(compare([record(time=1.5)], [record()])), 1, 'slowdown should be detected')
+        self.assertEqual(compare([record(time=0.005)], [record(time=0.001)]), [], 'noise should be ignored')
+        self.assertEqual(len(compare([record(objective=101)], [record()])), 1, 'worse objective should be detected')
+        self.assertEqual(compare([record(objective=101)], [record()], quality_tolerance=0.05), [])
+        self.assertEqual(len(compare([record(objective=None, feasible=False)], [record()])), 1)
+        self.assertEqual(compare([record(seed=1)], [record()]), [], 'unknown runs should be ignored')
+
+    def test_import_without_matplotlib(self):
+        record = measure_import('src.scheduling.optim.local_search', repeat=1)
+        self.assertGreater(record['time'], 0)
+        self.assertFalse(record['matplotlib'], 'matplotlib should only be imported to draw a gantt chart')
+
+
+if __name__ == "__main__":
+    unittest.main()
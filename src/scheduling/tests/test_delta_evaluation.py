@@ -0,0 +1,63 @@
+'''
+Tests for the DeltaEvaluator class.
+
+@author: Vassilissa Lehoux
+'''
+import unittest
+import os
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.optim.constructive import Greedy
+from src.scheduling.optim.delta_evaluation import DeltaEvaluator
+from src.scheduling.optim.neighborhoods import SwapNeighborhood, ShiftNeighborhood
+from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+
+
+def objective_or_none(sol):
+    return sol.objective if sol.is_feasible else None
+
+
+class TestDeltaEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+        self.sol = Greedy().run(self.inst)
+
+    def test_swap_matches_rescheduling(self):
+        evaluator = DeltaEvaluator(self.sol)
+        neigh = SwapNeighborhood(self.inst)
+        ops = [op for op in self.sol.all_operations if op.assigned]
+        for op1 in ops[:10]:
+            for op2 in ops:
+                m1, m2 = op1.assigned_to, op2.assigned_to
+                if m1 == m2 or m2 not in op1._machine_info or m1 not in op2._machine_info:
+                    continue
+                self.assertEqual(evaluator.swap(op1, op2),
+                                 objective_or_none(neigh._swap_operations(self.sol, op1, op2)),
+                                 f'wrong objective for the swap of {op1} and {op2}')
+
+    def test_shift_matches_rescheduling(self):
+        evaluator = DeltaEvaluator(self.sol)
+        neigh = ShiftNeighborhood(self.inst)
+        for op in self.sol.all_operations:
+            for delta in [-1, 1]:
+                start_time = max(op.start_time + delta, op.min_start_time)
+                self.assertEqual(evaluator.shift(op, start_time),
+                                 objective_or_none(neigh._shift_operation(self.sol, op, delta)),
+                                 f'wrong objective for the shift of {op}')
+
+    def test_rescheduled_solution_is_fixed_point(self):
+        neigh = SwapNeighborhood(self.inst)
+        op = self.sol.all_operations[0]
+        rescheduled = neigh._swap_operations(self.sol, op, op)
+        self.assertEqual(DeltaEvaluator(rescheduled).objective, rescheduled.objective)
+
+    def test_ineligible_machine(self):
+        evaluator = DeltaEvaluator(self.sol)
+        op = self.sol.all_operations[0]
+        index = evaluator.operation_index(op)
+        self.assertIsNone(evaluator.evaluate({index: (-1, op.start_time)}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+'''
+Tests for the list scheduling heuristic.
+
+@author: Vassilissa Lehoux
+'''
+import unittest
+import os
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.optim.dispatching import ListScheduling, DispatchingRule, DISPATCHING_RULES
+from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+
+
+class LastJobFirst(DispatchingRule):
+
+    def priority(self, operation, machine, start, end, scheduler):
+        return -operation.job_id
+
+
+class TestListScheduling(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+        # Some operations of jsp72 cannot be executed on every machine
+        self.inst72 = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp72")
+
+    def test_rules(self):
+        for rule in DISPATCHING_RULES:
+            for inst in [self.inst, self.inst72]:
+                sol = ListScheduling().run(inst, {'rule': rule})
+                self.assertTrue(sol.is_feasible, f'{rule} should give a feasible solution on {inst.name}')
+                for op in sol.all_operations:
+                    self.assertIn(op.assigned_to, op._machine_info)
+                    for pred in op.predecessors:
+                        self.assertLessEqual(pred.end_time, op.start_time)
+
+    def test_deterministic(self):
+        heur = ListScheduling({'rule': 'mwkr'})
+        obj = heur.run(self.inst).objective
+        self.assertEqual(heur.run(self.inst).objective, obj)
+
+    def test_custom_rule(self):
+        sol = ListScheduling().run(self.inst, {'rule': LastJobFirst()})
+        self.assertTrue(sol.is_feasible)
+
+    def test_remaining_work(self):
+        heur = ListScheduling()
+        heur.run(self.inst)
+        for job in self.inst.jobs:
+            self.assertEqual(heur.remaining_work(job.job_id), 0, 'all the work should be scheduled')
+
+    def test_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            ListScheduling().run(self.inst, {'rule': 'fifo'})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+'''
+Tests for the budget of the heuristics (time limit, iterations, callback).
+
+@author: Vassilissa Lehoux
+'''
+import unittest
+import os
+import time
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.solution import Solution
+from src.scheduling.optim.heuristics import Budget
+from src.scheduling.optim.constructive import Greedy, NonDeterminist
+from src.scheduling.optim.dispatching import ListScheduling
+from src.scheduling.optim.local_search import FirstNeighborLocalSearch, BestNeighborLocalSearch
+from src.scheduling.optim.neighborhoods import MyNeighborhood1
+from src.scheduling.optim.tabu_search import TabuSearch
+from src.scheduling.optim.simulated_annealing import SimulatedAnnealing
+from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+
+
+class TestBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+
+    def test_iterations(self):
+        budget = Budget({}, 3)
+        self.assertEqual(budget.progress, 0)
+        self.assertEqual(sum(1 for _ in iter(budget.next_iteration, False)), 3)
+        self.assertTrue(budget.expired)
+        self.assertEqual(budget.iterations, 3)
+        self.assertEqual(budget.progress, 1)
+        self.assertEqual(Budget({'max_iterations': 5}, 3).max_iterations, 5)
+        self.assertFalse(Budget({}).expired)
+
+    def test_time_limit(self):
+        budget = Budget({'time_limit': 0.05})
+        self.assertFalse(budget.expired)
+        time.sleep(0.06)
+        self.assertTrue(budget.expired)
+        self.assertFalse(budget.next_iteration())
+        self.assertEqual(budget.progress, 1)
+
+    def test_improved(self):
+        calls = []
+        budget = Budget({'callback': lambda sol, obj, elapsed: calls.append((sol, obj, elapsed))})
+        a, b, c = Solution(self.inst), Solution(self.inst), Solution(self.inst)
+        self.assertTrue(budget.improved(a, 10000))
+        self.assertFalse(budget.improved(b, 10000))
+        self.assertTrue(budget.improved(c, 7000))
+        self.assertEqual([(sol, obj) for sol, obj, _ in calls], [(a, 10000), (c, 7000)])
+        self.assertEqual([obj for _, obj in budget.improvements], [10000, 7000])
+        self.assertLessEqual(calls[0][2], calls[1][2])
+
+    def test_target_gap(self):
+        bound = self.inst.lower_bounds().objective
+        budget = Budget({})
+        budget.improved(Solution(self.inst), bound * 2)
+        self.assertAlmostEqual(budget.gap, 0.5)
+        self.assertFalse(budget.expired)
+        budget.improved(Solution(self.inst), bound)
+        self.assertTrue(budget.expired, 'an optimal solution should stop the run')
+        budget = Budget({'target_gap': 0.6})
+        budget.improved(Solution(self.inst), bound * 2)
+        self.assertTrue(budget.expired)
+
+        # The search stops as soon as its first solution is within the gap
+        heur = TabuSearch()
+        sol = heur.run(self.inst, {'seed': 0, 'max_iterations': 50, 'target_gap': 1})
+        self.assertEqual(heur.iterations, 0)
+        self.assertTrue(sol.is_feasible)
+        heur = FirstNeighborLocalSearch()
+        heur.run(self.inst, NonDeterminist, MyNeighborhood1, {'seed': 0, 'target_gap': 1})
+        self.assertEqual(heur.iterations, 0)
+
+    def test_callbacks(self):
+        for name, run in [
+                ('greedy', lambda p: Greedy().run(self.inst, p)),
+                ('non_det', lambda p: NonDeterminist().run(self.inst, {'seed': 0, **p})),
+                ('list', lambda p: ListScheduling().run(self.inst, p)),
+                ('first_local', lambda p: FirstNeighborLocalSearch().run(self.inst, NonDeterminist, MyNeighborhood1,
+                                                                         {'seed': 0, **p})),
+                ('best_local', lambda p: BestNeighborLocalSearch().run(self.inst, NonDeterminist,
+                                                                       params={'seed': 0, **p})),
+                ('tabu', lambda p: TabuSearch().run(self.inst, {'seed': 0, 'max_iterations': 50, **p})),
+                ('annealing', lambda p: SimulatedAnnealing().run(self.inst, {'seed': 0, 'max_iterations': 300, **p}))]:
+            objectives = []
+            sol = run({'callback': lambda sol, obj, elapsed: objectives.append(obj)})
+            self.assertTrue(objectives, name)
+            self.assertEqual(objectives, sorted(objectives, reverse=True), name)
+            self.assertEqual(len(set(objectives)), len(objectives), name)
+            self.assertEqual(objectives[-1], sol.objective, name)
+
+    def test_local_search_budget(self):
+        heur = BestNeighborLocalSearch()
+        full = heur.run(self.inst, NonDeterminist, params={'seed': 0})
+        self.assertEqual(heur.improvements[-1][1], full.objective)
+        sol = heur.run(self.inst, NonDeterminist, params={'seed': 0, 'max_iterations': 1})
+        self.assertEqual(heur.iterations, 1)
+        self.assertEqual(sol.objective, heur.improvements[-1][1])
+        heur = FirstNeighborLocalSearch()
+        sol = heur.run(self.inst, NonDeterminist, MyNeighborhood1, {'seed': 0, 'time_limit': 0})
+        self.assertEqual(heur.iterations, 0)
+        self.assertTrue(sol.is_feasible)
+        self.assertEqual(heur.improvements[0][1], sol.objective)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,8 +5,12 @@ Tests for the Instance class.
 '''
 import unittest
 import os
+import shutil
+import tempfile
 
 from src.scheduling.instance.instance import Instance
+from src.scheduling.instance.compact import INELIGIBLE
+from src.scheduling.instance.loader import cache_path
 from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
 
 
@@ -27,7 +31,118 @@ class TestInstances(unittest.TestCase):
         self.assertEqual(len(self.inst.machines), 4, 'wrong nb of machines')
         self.assertEqual(len(self.inst.jobs), 2, 'wrong nb of jobs')
         self.assertEqual(str(self.inst), 'jsp1_M4_J2_O4', 'wrong string representation of the instance')
-        
+
+    def test_from_file_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            folderpath = os.path.join(folder, "jsp1")
+            shutil.copytree(TEST_FOLDER_DATA + os.path.sep + "jsp1", folderpath)
+            inst = Instance.from_file(folderpath, cache=True)
+            self.assertTrue(os.path.exists(cache_path(folderpath)), 'cache should be written')
+            self.assertEqual(str(inst), 'jsp1_M4_J2_O4')
+            self.assertEqual(inst.get_operation((0, 0))._machine_info, self.inst.get_operation((0, 0))._machine_info)
+
+            # Same content with another modification time: the hash validates the cache
+            op_path = os.path.join(folderpath, "jsp1_op.csv")
+            os.utime(op_path, ns=(0, 0))
+            self.assertEqual(str(Instance.from_file(folderpath, cache=True)), 'jsp1_M4_J2_O4')
+
+            # Modified instance: the cache is rebuilt
+            with open(op_path, 'a') as f:
+                f.write("\n2,0,0,5,5\n")
+            inst = Instance.from_file(folderpath, cache=True)
+            self.assertEqual(inst.nb_jobs, 3, 'modified instance should be parsed again')
+            self.assertEqual(Instance.from_file(folderpath, cache=True).nb_jobs, 3)
+
+            # The modification times are checked before the content
+            mtime = os.stat(op_path).st_mtime_ns
+            with open(op_path, 'a') as f:
+                f.write("3,0,0,5,5\n")
+            os.utime(op_path, ns=(mtime, mtime))
+            self.assertEqual(Instance.from_file(folderpath, cache=True).nb_jobs, 3, 'cache should be used')
+            self.assertEqual(Instance.from_file(folderpath).nb_jobs, 4)
+
+    def test_topological_order(self):
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp10")
+        order = inst.topological_order
+        self.assertEqual(len(order), inst.nb_operations, 'every operation should be in the order')
+        position = {op: i for i, op in enumerate(order)}
+        for op in order:
+            for pred in op.predecessors:
+                self.assertLess(position[pred], position[op], 'predecessor after its successor')
+        for i, op in enumerate(inst.operations):
+            self.assertEqual(op.index, i, 'wrong operation index')
+        self.assertIs(inst.topological_order, order, 'order should be computed once')
+        with self.assertRaises(TypeError):
+            order[0] = None
+
+    def test_eligibility(self):
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp72")
+        for op in inst.operations:
+            row = inst.eligibility[op.index]
+            for machine in inst.machines:
+                eligible = machine.machine_id in op._machine_info
+                self.assertEqual(bool(row[machine.machine_id]), eligible, 'wrong eligibility')
+                self.assertEqual(op in inst.eligible_operations(machine.machine_id), eligible,
+                                 'wrong eligible operations')
+            self.assertEqual([m for m, _, _ in op.machine_options], sorted(op._machine_info))
+            self.assertEqual(op.min_duration, min(d for d, _ in op._machine_info.values()))
+            self.assertEqual(op.max_duration, max(d for d, _ in op._machine_info.values()))
+            self.assertEqual(op.min_energy, min(e for _, e in op._machine_info.values()))
+            self.assertEqual(op.max_energy, max(e for _, e in op._machine_info.values()))
+        self.assertEqual(len(inst.eligible_operations(inst.nb_machines)), 0, 'unknown machine')
+
+    def test_lower_bounds(self):
+        bounds = self.inst.lower_bounds()
+        self.assertIs(self.inst.lower_bounds(), bounds, 'bounds should be computed once')
+        # Job 0: set up of machine 0 (15) + 10 + minimal duration of operation 1 (4)
+        # Job 1: set up of machine 2 (12) + 6 + minimal duration of operation 3 (7)
+        self.assertEqual(bounds.job_completion, [29, 25], 'wrong job bounds')
+        self.assertEqual(bounds.sum_ci, 54)
+        self.assertEqual(bounds.cmax, 29)
+        # Minimal energy of the operations (11 + 5 + 7 + 9), set up and tear down of machine 2
+        self.assertEqual(bounds.energy, 37, 'wrong energy bound')
+        self.assertEqual(bounds.objective, 128)
+        self.assertEqual(bounds.gap(256), 0.5)
+        self.assertEqual(bounds.gap(128), 0)
+
+    def test_lower_bounds_ineligible(self):
+        from src.scheduling.optim.constructive import NonDeterminist
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp72")
+        bounds = inst.lower_bounds()
+        sol = NonDeterminist().run(inst, {'seed': 0})
+        self.assertTrue(sol.is_feasible)
+        self.assertLessEqual(bounds.objective, sol.objective)
+        self.assertLessEqual(bounds.energy, sol.total_energy_consumption)
+        self.assertLessEqual(bounds.cmax, sol.cmax)
+        self.assertGreater(bounds.objective, 0)
+
+    def test_to_arrays(self):
+        compact = self.inst.to_arrays()
+        self.assertIs(self.inst.to_arrays(), compact, 'arrays should be built once')
+        self.assertEqual(str(compact), 'jsp1_M4_J2_O4', 'wrong string representation of the arrays')
+        self.assertEqual(compact.duration.shape, (4, 4), 'wrong shape of the duration matrix')
+        self.assertEqual(list(compact.job_offsets), [0, 2, 4], 'wrong job offsets')
+        self.assertEqual(list(compact.operation_ids), [0, 1, 2, 3], 'wrong operation ids')
+        self.assertEqual(compact.duration[0, 1], 12, 'wrong duration')
+        self.assertEqual(compact.energy[2, 3], 7, 'wrong energy')
+        self.assertTrue(compact.eligible.all(), 'all machines are eligible in jsp1')
+        self.assertEqual(list(compact.set_up_time), [15, 20, 12, 20], 'wrong set up times')
+        self.assertEqual(list(compact.end_time), [100, 120, 130, 110], 'wrong end times')
+        self.assertEqual(list(compact.job_of_operation), [0, 0, 1, 1], 'wrong job of operation')
+        self.assertEqual(list(compact.first_of_job), [True, False, True, False], 'wrong first operations')
+
+    def test_to_arrays_ineligible(self):
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp72")
+        compact = inst.to_arrays()
+        for row, (job_id, op_id) in enumerate(zip(compact.job_ids, compact.operation_ids)):
+            op = inst.get_operation((int(job_id), int(op_id)))
+            for col, machine_id in enumerate(compact.machine_ids):
+                if int(machine_id) in op._machine_info:
+                    self.assertEqual(compact.duration[row, col], op._machine_info[int(machine_id)][0])
+                else:
+                    self.assertEqual(compact.duration[row, col], INELIGIBLE)
+        self.assertFalse(compact.eligible.all(), 'some machines are not eligible in jsp72')
+
 
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
@@ -4,6 +4,7 @@ Tests for the Machine class
 @author: Vassilissa Lehoux
 '''
 import unittest
+from copy import deepcopy
 from src.scheduling.instance.machine import Machine
 from src.scheduling.instance.operation import Operation, OperationScheduleInfo
 
@@ -182,6 +183,61 @@ class TestMachine(unittest.TestCase):
         # Restore original method
         Operation.schedule = original_schedule
 
+    def test_views(self):
+        original_schedule = Operation.schedule
+        Operation.schedule = lambda self, machine_id, at_time: True
+
+        operations = self.machine.scheduled_operations_view
+        start_times = self.machine.start_times_view
+        self.assertIs(self.machine.scheduled_operations_view, operations, 'views should not be rebuilt')
+        self.machine.add_operation(self.op1, 0)
+        self.machine.stop(5)
+        self.assertEqual(list(operations), [self.op1], 'view should reflect the schedule')
+        self.assertEqual(start_times, self.machine.start_times)
+        self.assertEqual(self.machine.stop_times_view[-1], 5)
+        self.assertFalse(hasattr(operations, 'append'), 'view should be read only')
+
+        copied = deepcopy(self.machine)
+        copied.reset()
+        self.assertEqual(len(operations), 1, 'copy should have its own lists')
+        self.assertEqual(len(copied.scheduled_operations_view), 0)
+        self.machine.reset()
+        self.assertEqual(len(operations), 0, 'view should stay valid after reset')
+
+        Operation.schedule = original_schedule
+
+    def test_power_plan(self):
+        # Gap of 5: restarting (10 + 5) costs more than staying idle (5 * 1)
+        # Gap of 25: restarting is cheaper than staying idle
+        starts, stops, energy = self.machine.power_plan([(2, 5), (10, 15), (40, 44)])
+        self.assertEqual(starts, [0, 38])
+        self.assertEqual(stops, [15, 44])
+        self.assertEqual(energy, 15 + 5 + 15)
+        self.assertEqual(self.machine.power_plan([]), ([], [], 0))
+        # Restarting would be cheaper but the gap is shorter than tear down + set up
+        machine = Machine(2, set_up_time=2, set_up_energy=10, tear_down_time=1, tear_down_energy=5,
+                          min_consumption=10, end_time=100)
+        self.assertEqual(machine.power_plan([(2, 5), (7, 9)]), ([0], [9], 15 + 20))
+        self.assertEqual(machine.power_plan([(2, 5), (8, 9)]), ([0, 6], [5, 9], 30))
+        with self.assertRaises(ValueError):
+            machine.power_plan([(1, 5)])
+        # The machine must be torn down before its end time
+        self.assertEqual(machine.latest_end, 99)
+
+    def test_optimize_power(self):
+        original_schedule = Operation.schedule
+        Operation.schedule = lambda self, machine_id, at_time: True
+
+        for op in (self.op1, self.op2, self.op3):
+            self.machine.add_operation(op, op.start_time)
+        self.machine.optimize_power()
+        self.assertEqual(self.machine.start_times, [0])
+        self.assertEqual(self.machine.stop_times, [26])
+        # set up + tear down, idle 5 and 7, operations
+        self.assertEqual(self.machine.total_energy_consumption, 15 + 12 + 75)
+
+        Operation.schedule = original_schedule
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
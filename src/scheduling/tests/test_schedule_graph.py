@@ -0,0 +1,83 @@
+'''
+Tests for the ScheduleGraph class.
+
+@author: Vassilissa Lehoux
+'''
+import unittest
+import os
+import random
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.optim.constructive import NonDeterminist
+from src.scheduling.optim.schedule_graph import ScheduleGraph
+from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+
+
+class TestScheduleGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+        self.sol = NonDeterminist().run(self.inst, {'seed': 0})
+        self.graph = ScheduleGraph.from_solution(self.sol)
+
+    def random_move(self, rng):
+        i = rng.randrange(len(self.inst.operations))
+        machine_id = rng.choice([m for m in self.inst.operations[i]._machine_info
+                                 if self.inst.get_machine(m) is not None])
+        after = rng.choice([-1] + [k for k in self.graph.sequence(machine_id) if k != i])
+        return i, machine_id, after
+
+    def test_from_solution(self):
+        graph = self.graph
+        for i, op in enumerate(self.inst.operations):
+            self.assertLessEqual(graph.head(i), op.start_time, 'operations should start as early as possible')
+            for p in op.predecessors:
+                self.assertLessEqual(graph.end(p.index), graph.head(i))
+        self.assertTrue(any(graph.is_critical(i) for i in range(len(self.inst.operations))))
+        sol = self.sol.copy()
+        graph.apply(sol)
+        self.assertTrue(sol.is_feasible)
+        self.assertEqual(sol.objective, graph.objective)
+        self.assertEqual(sol.cmax, graph.makespan)
+
+    def test_incremental_update(self):
+        rng = random.Random(0)
+        nb_moves = 0
+        for _ in range(100):
+            i, machine_id, after = self.random_move(rng)
+            objective = self.graph.objective
+            if self.graph.move(i, machine_id, after):
+                nb_moves += 1
+                self.assertEqual(self.graph.machine_of(i), machine_id)
+            else:
+                self.assertEqual(self.graph.objective, objective, 'rejected move should not change the graph')
+            full = ScheduleGraph(self.inst, {m.machine_id: self.graph.sequence(m.machine_id)
+                                             for m in self.inst.machines})
+            for k in range(len(self.inst.operations)):
+                self.assertEqual(self.graph.head(k), full.head(k), 'wrong head')
+                self.assertEqual(self.graph.tail(k), full.tail(k), 'wrong tail')
+            self.assertEqual(self.graph.objective, full.objective)
+        self.assertGreater(nb_moves, 0)
+
+    def test_cycle(self):
+        # The second operation of a job cannot be before the first one on the same machine
+        job = next(job for job in self.inst.jobs if len(job.operations) > 1)
+        first, second = (op.index for op in job.operations[:2])
+        machine_id = next((m for m in self.inst.operations[first]._machine_info
+                           if m in self.inst.operations[second]._machine_info), None)
+        if machine_id is None:
+            self.skipTest('no common machine')
+        self.assertTrue(self.graph.move(first, machine_id))
+        objective = self.graph.objective
+        self.assertFalse(self.graph.move(second, machine_id, -1), 'move should create a cycle')
+        self.assertEqual(self.graph.sequence(machine_id)[0], first)
+        self.assertEqual(self.graph.objective, objective)
+        self.assertTrue(self.graph.move(second, machine_id, first))
+
+    def test_invalid_sequences(self):
+        with self.assertRaises(ValueError):
+            ScheduleGraph(self.inst, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+'''
+Tests for the simulated annealing.
+
+@author: Vassilissa Lehoux
+'''
+import unittest
+import os
+import time
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.optim.constructive import NonDeterminist
+from src.scheduling.optim.delta_evaluation import DeltaEvaluator
+from src.scheduling.optim.simulated_annealing import SimulatedAnnealing, COOLING_SCHEDULES
+from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+
+
+class TestSimulatedAnnealing(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+
+    def test_improves_initial_solution(self):
+        initial = DeltaEvaluator(NonDeterminist().run(self.inst, {'seed': 0})).objective
+        heur = SimulatedAnnealing()
+        sol = heur.run(self.inst, {'seed': 0, 'max_iterations': 2000})
+        self.assertTrue(sol.is_feasible)
+        self.assertEqual(heur.iterations, 2000)
+        self.assertLess(sol.objective, initial, 'annealing should improve the rebuilt initial solution')
+        self.assertEqual(DeltaEvaluator(sol).objective, sol.objective, 'returned solution should be rebuilt')
+
+    def test_seed(self):
+        params = {'seed': 3, 'max_iterations': 300}
+        heur = SimulatedAnnealing(params)
+        obj = heur.run(self.inst).objective
+        self.assertEqual(heur.seed, 3)
+        self.assertEqual(SimulatedAnnealing().run(self.inst, params).objective, obj)
+
+    def test_time_limit(self):
+        start = time.perf_counter()
+        heur = SimulatedAnnealing()
+        sol = heur.run(self.inst, {'seed': 0, 'max_iterations': 10**9, 'time_limit': 0.2})
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertTrue(sol.is_feasible)
+        self.assertGreater(heur.iterations, 0)
+
+    def test_cooling(self):
+        for name, cooling in COOLING_SCHEDULES.items():
+            self.assertAlmostEqual(cooling(10, 1, 0), 10, msg=name)
+            self.assertAlmostEqual(cooling(10, 1, 1), 1, msg=name)
+            self.assertGreater(cooling(10, 1, 0.3), cooling(10, 1, 0.6), name)
+            sol = SimulatedAnnealing().run(self.inst, {'seed': 0, 'max_iterations': 100, 'cooling': name})
+            self.assertTrue(sol.is_feasible)
+        temperatures = []
+        SimulatedAnnealing().run(self.inst, {'seed': 0, 'max_iterations': 10, 'initial_temperature': 5,
+                                             'cooling': lambda t0, t1, p: temperatures.append(t0) or t0})
+        self.assertEqual(temperatures, [5] * 10)
+        with self.assertRaises(ValueError):
+            SimulatedAnnealing().run(self.inst, {'seed': 0, 'cooling': 'unknown'})
+        for params in [{'initial_temperature': 0}, {'final_temperature': 0}, {'initial_temperature': -1}]:
+            with self.assertRaises(ValueError):
+                SimulatedAnnealing().run(self.inst, {'seed': 0, **params})
+
+    def test_reheat(self):
+        heur = SimulatedAnnealing()
+        sol = heur.run(self.inst, {'seed': 0, 'max_iterations': 500, 'reheat_after': 50})
+        self.assertGreater(heur.reheats, 0)
+        self.assertTrue(sol.is_feasible)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,12 +5,17 @@ Test of the Solution class.
 '''
 import unittest
 import os
+import random
+
+import numpy as np
 
 from src.scheduling.instance.instance import Instance
 from src.scheduling.optim.constructive import Greedy, NonDeterminist
 from src.scheduling.solution import Solution
 from src.scheduling.tests.test_utils import TEST_FOLDER_DATA, TEST_FOLDER
-from src.scheduling.optim.neighborhoods import SwapNeighborhood, ShiftNeighborhood
+from src.scheduling.optim.neighborhoods import SwapNeighborhood, ShiftNeighborhood, CriticalPathNeighborhood
+from src.scheduling.optim.delta_evaluation import DeltaEvaluator
+from src.scheduling.optim.local_search import FirstNeighborLocalSearch, BestNeighborLocalSearch
 
 
 class TestSolution(unittest.TestCase):
@@ -80,6 +85,19 @@ class TestSolution(unittest.TestCase):
         plt = sol.gantt('tab20')
         plt.savefig(TEST_FOLDER + os.path.sep +  'temp.png')
 
+    def test_schedule_info_in_place(self):
+        sol = Solution(self.inst1)
+        operation = self.inst1.operations[0]
+        sol.schedule(operation, self.inst1.machines[1])
+        info = operation._schedule_info
+        sol.reset()
+        self.assertFalse(operation.assigned)
+        sol.schedule(operation, self.inst1.machines[0])
+        self.assertIs(operation._schedule_info, info, 'schedule information should be reused')
+        self.assertEqual(operation.assigned_to, 0)
+        self.assertEqual(operation.processing_time, operation._machine_info[0][0])
+        self.assertFalse(hasattr(operation, '__dict__'), 'operations should not have a __dict__')
+
     def test_objective(self):
         sol = Solution(self.inst1)
         # Before any scheduling, objective should be zero or raise because not feasible
@@ -116,6 +134,117 @@ class TestSolution(unittest.TestCase):
         self.assertEqual(val_eval, val_obj, "evaluate and objective must match")
         self.assertIsInstance(val_eval, int, "evaluate should return an integer")
 
+    def test_evaluation_cache(self):
+        sol = Solution(self.inst1)
+        evaluation = sol.evaluation
+        self.assertFalse(evaluation.feasible, 'empty solution should not be feasible')
+        self.assertIs(sol.evaluation, evaluation, 'evaluation should be cached')
+
+        while sol.available_operations:
+            op = sol.available_operations[0]
+            for m in self.inst1.machines:
+                if m.machine_id in op._machine_info:
+                    sol.schedule(op, m)
+                    break
+        self.assertIsNot(sol.evaluation, evaluation, 'schedule should invalidate the evaluation')
+        self.assertTrue(sol.is_feasible)
+        obj = sol.objective
+        self.assertEqual(obj, sol.total_energy_consumption*2 + sum(j.completion_time for j in self.inst1.jobs))
+
+        evaluation = sol.evaluation
+        machine = self.inst1.machines[0]
+        machine.stop(machine.available_time)
+        self.assertIsNot(sol.evaluation, evaluation, 'stop should invalidate the evaluation')
+        self.assertEqual(sol.total_energy_consumption,
+                         sum(m.total_energy_consumption for m in self.inst1.machines))
+
+        sol.reset()
+        self.assertFalse(sol.is_feasible, 'reset should invalidate the evaluation')
+
+        # A schedule interrupted by an exception leaves the solution usable
+        evaluation = sol.evaluation
+        op = sol.available_operations[0]
+        original = Solution._schedule_on_machine
+
+        def interrupted(self, operation, machine):
+            machine._changed()
+            raise TimeoutError()
+        Solution._schedule_on_machine = interrupted
+        try:
+            with self.assertRaises(TimeoutError):
+                sol.schedule(op, self.inst1.machines[0])
+        finally:
+            Solution._schedule_on_machine = original
+        self.assertIsNot(sol.evaluation, evaluation, 'the evaluation should be invalidated')
+        self.assertFalse(sol._scheduling, 'the solution should leave the scheduling mode')
+        self.assertIn(op, sol.available_operations)
+
+    def test_several_solutions(self):
+        sol = NonDeterminist().run(self.inst1, {'seed': 0})
+        objective = sol.objective
+        # A new solution on the same instance resets the schedule
+        other = Solution(self.inst1)
+        self.assertFalse(other.is_feasible)
+        self.assertFalse(sol.is_feasible, 'the evaluation of the first solution should not be stale')
+        self.assertEqual(sol.available_operations, other.available_operations)
+        last = NonDeterminist().run(self.inst1, {'seed': 0})
+        self.assertEqual(sol.objective, objective)
+        last.reset()
+        self.assertFalse(sol.is_feasible, 'changes made by another solution should invalidate the evaluation')
+        self.assertFalse(last.is_feasible)
+
+    def test_snapshot_restore(self):
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+        sol = NonDeterminist().run(inst, {'seed': 1})
+
+        def state(sol):
+            return ([(op.assigned_to, op.start_time, op.energy) for op in sol.all_operations],
+                    [(m.scheduled_operations, m.start_times, m.stop_times, m.total_energy_consumption)
+                     for m in sol.inst.machines])
+
+        expected = state(sol)
+        objective = sol.objective
+        snapshot = sol.snapshot()
+        sol.reset()
+        self.assertFalse(sol.is_feasible)
+        sol.restore(snapshot)
+        self.assertEqual(state(sol), expected, 'restore should give back the schedule')
+        self.assertEqual(sol.objective, objective)
+        self.assertEqual(sol.available_operations, [])
+
+        copy = sol.copy()
+        self.assertIsNot(copy.inst, sol.inst, 'copy should have its own instance')
+        other = NonDeterminist().run(copy.inst, {'seed': 2})
+        self.assertIs(sol.copy(into=other), other)
+        self.assertEqual(other.objective, objective, 'schedule should be restored in the copy')
+        self.assertEqual(state(sol), expected, 'the copied solution should not change')
+        with self.assertRaises(ValueError):
+            Solution(self.inst1).restore(snapshot)
+
+    def test_available_operations(self):
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+        sol = Solution(inst)
+
+        def expected():
+            return {op for op in inst.operations
+                    if not op.assigned and all(pred.assigned for pred in op.predecessors)}
+
+        while sol.available_operations:
+            self.assertEqual(set(sol.available_operations), expected())
+            op = sol.available_operations[-1]
+            self.assertTrue(sol.is_available(op))
+            sol.schedule(op, inst.get_machine(next(iter(op._machine_info))))
+            self.assertFalse(sol.is_available(op), 'scheduled operation should not be available')
+        self.assertTrue(all(op.assigned for op in inst.operations))
+
+        # Changes made directly on the machines are taken into account
+        sol.reset()
+        self.assertEqual(set(sol.available_operations), expected())
+        op = sol.available_operations[0]
+        op.schedule(next(iter(op._machine_info)), 0)
+        inst.get_machine(op.assigned_to).add_operation(op, 0)
+        self.assertEqual(set(sol.available_operations), expected())
+
     def test_optim_greed(self):
         inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
         heur = Greedy()
@@ -134,6 +263,70 @@ class TestSolution(unittest.TestCase):
         self.assertTrue(sol.is_feasible,"sould be feasible")
 
 
+    def test_optimize_power(self):
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+        sol = NonDeterminist().run(inst, {'seed': 0})
+        for machine in inst.machines:
+            operations = sorted(machine.scheduled_operations_view, key=lambda op: op.start_time)
+            _, _, power = machine.power_plan([(op.start_time, op.end_time) for op in operations])
+            self.assertEqual(machine.total_energy_consumption, power + sum(op.energy for op in operations))
+            self.assertEqual(len(machine.start_times), len(machine.stop_times))
+        self.assertGreater(sol.total_energy_consumption, 0)
+        self.assertEqual(DeltaEvaluator(sol).objective, sol.objective,
+                         'constructive and rebuilt solutions should have the same power plan')
+        starts = [op.start_time for op in sol.all_operations]
+        sol.optimize_power()
+        self.assertEqual([op.start_time for op in sol.all_operations], starts, 'operations should not move')
+
+    def test_non_det_eligible_machines(self):
+        # Some operations of jsp72 cannot be executed on every machine
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp72")
+        for seed in range(5):
+            sol = NonDeterminist().run(inst, {'seed': seed, 'max_attempts': 1})
+            self.assertTrue(sol.is_feasible, "one construction should be enough")
+            for op in sol.all_operations:
+                self.assertIn(op.assigned_to, op._machine_info, "machine should be able to execute the operation")
+
+    def test_non_det_failure(self):
+        # The only construction ends too late: the schedule built is returned
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp10")
+        sol = NonDeterminist().run(inst, {'seed': 2, 'max_attempts': 1, 'temperature': 1000})
+        self.assertFalse(sol.is_feasible)
+        self.assertGreater(sum(1 for op in sol.all_operations if op.assigned), 0, "construction should be kept")
+        with self.assertRaises(ValueError):
+            NonDeterminist().run(inst, {'temperature': 0})
+
+    def test_non_det_seed(self):
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+
+        def assignment(sol):
+            return [op.assigned_to for op in sol.all_operations]
+
+        heur = NonDeterminist()
+        first = assignment(heur.run(inst, {'seed': 42}))
+        self.assertEqual(heur.seed, 42, 'seed should be recorded')
+        self.assertEqual(assignment(heur.run(inst, {'seed': 42})), first, 'same seed should give the same solution')
+        self.assertEqual(assignment(heur.run(inst, {'rng': random.Random(42)})), first,
+                         'seeded generator should give the same solution')
+        heur.run(inst)
+        self.assertIsNotNone(heur.seed, 'drawn seed should be recorded')
+        drawn = assignment(heur.solution)
+        self.assertEqual(assignment(heur.run(inst, {'seed': heur.seed})), drawn, 'recorded seed should replay the run')
+        heur.run(inst, {'rng': np.random.default_rng(1)})
+        self.assertIsNone(heur.seed, 'seed of a given generator is unknown')
+
+    def test_local_search_seed(self):
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+        heur = FirstNeighborLocalSearch()
+        obj = heur.run(inst, NonDeterminist, SwapNeighborhood, {'seed': 7}).objective
+        self.assertEqual(heur.seed, 7, 'seed should be recorded')
+        self.assertEqual(heur.run(inst, NonDeterminist, SwapNeighborhood, {'seed': 7}).objective, obj)
+        heur = BestNeighborLocalSearch({'seed': 7})
+        obj = heur.run(inst, NonDeterminist).objective
+        self.assertEqual(heur.seed, 7, 'seed of the constructor should be used')
+        self.assertEqual(BestNeighborLocalSearch().run(inst, NonDeterminist, params={'seed': 7}).objective, obj)
+
+
 class TestNeighborhoods(unittest.TestCase):
     def setUp(self):
         self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "jsp1")
@@ -146,12 +339,54 @@ class TestNeighborhoods(unittest.TestCase):
         self.assertTrue(neighbor_sol.is_feasible, "SwapNeighborhood: neighbor should be feasible")
         # Le voisin doit être au moins aussi bon ou meilleur
         self.assertLessEqual(neighbor_sol.objective, self.sol.objective, "SwapNeighborhood: neighbor should not be worse than original")
+        # Infeasible solution with every operation assigned
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp22")
+        sol = Greedy().run(inst)
+        self.assertFalse(sol.is_feasible)
+        neigh = SwapNeighborhood(inst)
+        self.assertIs(neigh.first_better_neighbor(sol), sol, "SwapNeighborhood: infeasible solution should be kept")
+        self.assertIs(neigh.best_neighbor(sol), sol)
 
     def test_shift_neighborhood(self):
         neigh = ShiftNeighborhood(self.inst)
         neighbor_sol = neigh.best_neighbor(self.sol)
         self.assertTrue(neighbor_sol.is_feasible, "ShiftNeighborhood: neighbor should be feasible")
         self.assertLessEqual(neighbor_sol.objective, self.sol.objective, "ShiftNeighborhood: neighbor should not be worse than original")
+        empty = Solution(self.inst)
+        self.assertIs(neigh.first_better_neighbor(empty), empty, "ShiftNeighborhood: infeasible solution should be kept")
+        self.assertIs(neigh.best_neighbor(empty), empty)
+
+    def test_critical_path_neighborhood(self):
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp22")
+        sol = NonDeterminist().run(inst, {'seed': 0})
+        neigh = CriticalPathNeighborhood(inst)
+        evaluator = DeltaEvaluator(sol)
+        for path in neigh.critical_paths(evaluator):
+            last, _ = path[0]
+            job_id = evaluator.operations[last].job_id
+            self.assertEqual(evaluator.schedule_of(last)[2],
+                             max(evaluator.schedule_of(i)[2] for i, op in enumerate(evaluator.operations)
+                                 if op.job_id == job_id), 'path should end with the last operation of the job')
+        moves = neigh.moves(evaluator)
+        nb_pairs = inst.nb_operations * (inst.nb_operations - 1) // 2
+        self.assertLess(len(moves), nb_pairs / 5, 'moves should be much fewer than the swaps')
+        for changes in moves[:20]:
+            neighbor = neigh._apply(sol, evaluator, changes)
+            self.assertEqual(evaluator.evaluate(changes), neighbor.objective if neighbor.is_feasible else None)
+        # Solution rebuilt as the neighbors are
+        rebuilt = neigh._apply(sol, evaluator, {})
+        neighbor_sol = neigh.best_neighbor(rebuilt)
+        self.assertLess(neighbor_sol.objective, rebuilt.objective, 'a move should improve the rebuilt solution')
+
+    def test_critical_path_neighborhood_infeasible(self):
+        # Greedy assigns every operation of jsp22 but ends too late on some machine
+        inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp22")
+        sol = Greedy().run(inst)
+        self.assertTrue(all(op.assigned for op in inst.operations))
+        self.assertFalse(sol.is_feasible)
+        neigh = CriticalPathNeighborhood(inst)
+        self.assertIs(neigh.best_neighbor(sol), sol, 'infeasible solution should be kept')
+        self.assertIs(neigh.first_better_neighbor(sol), sol)
 
 
 if __name__ == "__main__":
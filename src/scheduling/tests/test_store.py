@@ -0,0 +1,78 @@
+'''
+Tests of the instance store.
+
+@author: Vassilissa Lehoux
+'''
+import unittest
+import os
+import tempfile
+from unittest import mock
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.instance.store import InstanceStore
+from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+
+
+class TestInstanceStore(unittest.TestCase):
+
+    def setUp(self):
+        self.folders = [TEST_FOLDER_DATA + os.path.sep + "jsp1",
+                        TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp72"]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "instances.store")
+        InstanceStore.build(self.folders, self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_instances(self):
+        with InstanceStore(self.path) as store:
+            self.assertEqual(store.names, ['jsp1', 'jsp72'])
+            self.assertEqual(len(store), 2)
+            self.assertIn('jsp72', store)
+            for folder, name in zip(self.folders, store.names):
+                expected = Instance.from_file(folder)
+                inst = store.instance(name)
+                self.assertEqual(str(inst), str(expected))
+                for op in expected.operations:
+                    self.assertEqual(inst.get_operation((op.job_id, op.operation_id))._machine_info,
+                                     op._machine_info)
+                    self.assertEqual(len(inst.get_operation((op.job_id, op.operation_id)).predecessors),
+                                     len(op.predecessors))
+                for machine in expected.machines:
+                    self.assertEqual(inst.get_machine(machine.machine_id).set_up_time, machine.set_up_time)
+                    self.assertEqual(inst.get_machine(machine.machine_id)._end_time, machine._end_time)
+
+    def test_rows(self):
+        with InstanceStore(self.path) as store:
+            op_rows, machine_rows = store.rows('jsp1')
+            self.assertIsInstance(op_rows, memoryview, 'rows should be views on the file')
+            self.assertEqual(len(op_rows), 16 * 5)
+            self.assertEqual(list(machine_rows[:7]), [0, 15, 4, 15, 4, 1, 100])
+            op_rows.release()
+            machine_rows.release()
+
+    def test_byte_order(self):
+        with open(self.path, 'rb') as f:
+            little_endian = f.read()
+        # On a big endian host, the data is swapped when it is written and read
+        path = os.path.join(self.tmp.name, "big_endian.store")
+        with mock.patch('sys.byteorder', 'big'):
+            InstanceStore.build(self.folders, path)
+            with InstanceStore(path) as store:
+                op_rows, machine_rows = store.rows('jsp1')
+                self.assertEqual(list(machine_rows[:7]), [0, 15, 4, 15, 4, 1, 100])
+                self.assertEqual(str(store.instance('jsp72')), str(Instance.from_file(self.folders[1])))
+        with open(path, 'rb') as f:
+            self.assertNotEqual(f.read(), little_endian, 'the simulated big endian host should write swapped data')
+
+    def test_not_a_store(self):
+        path = os.path.join(self.tmp.name, "other")
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            InstanceStore(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+'''
+Tests for the tabu search.
+
+@author: Vassilissa Lehoux
+'''
+import unittest
+import os
+import time
+
+from src.scheduling.instance.instance import Instance
+from src.scheduling.optim.constructive import NonDeterminist
+from src.scheduling.optim.delta_evaluation import DeltaEvaluator
+from src.scheduling.optim.tabu_search import TabuSearch
+from src.scheduling.tests.test_utils import TEST_FOLDER_DATA
+
+
+class TestTabuSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = Instance.from_file(TEST_FOLDER_DATA + os.path.sep + "../../../../data/jsp5")
+
+    def test_improves_initial_solution(self):
+        initial = DeltaEvaluator(NonDeterminist().run(self.inst, {'seed': 0})).objective
+        heur = TabuSearch()
+        sol = heur.run(self.inst, {'seed': 0, 'max_iterations': 200})
+        self.assertTrue(sol.is_feasible)
+        self.assertEqual(heur.iterations, 200)
+        self.assertLess(sol.objective, initial, 'tabu search should improve the rebuilt initial solution')
+        self.assertEqual(DeltaEvaluator(sol).objective, sol.objective, 'returned solution should be rebuilt')
+
+    def test_seed(self):
+        params = {'seed': 3, 'max_iterations': 50}
+        heur = TabuSearch(params)
+        obj = heur.run(self.inst).objective
+        self.assertEqual(heur.seed, 3)
+        self.assertEqual(TabuSearch().run(self.inst, params).objective, obj)
+
+    def test_time_limit(self):
+        start = time.perf_counter()
+        heur = TabuSearch()
+        sol = heur.run(self.inst, {'seed': 0, 'max_iterations': 10**9, 'time_limit': 0.2})
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertTrue(sol.is_feasible)
+        self.assertGreater(heur.iterations, 0)
+
+    def test_tenure(self):
+        with self.assertRaises(ValueError):
+            TabuSearch().run(self.inst, {'seed': 0, 'tenure': 0})
+        sol = TabuSearch().run(self.inst, {'seed': 0, 'max_iterations': 20, 'tenure': 1})
+        self.assertTrue(sol.is_feasible)
+
+
+if __name__ == "__main__":
+    unittest.main()